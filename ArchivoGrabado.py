@@ -0,0 +1,154 @@
+# ArchivoGrabado.py
+import mmap
+import os
+import numpy as np
+from Grabador import EXTENSION_SEGMENTO, EXTENSION_INDICE, TAMANO_REGISTRO
+from ParserMJPEG import SOI, EOI
+
+# Mismo formato que Grabador.FORMATO_INDICE
+DTYPE_INDICE = np.dtype([("ms", "<i8"), ("offset", "<u8"), ("longitud", "<u4")])
+FPS_SUPUESTO = 25  # para repartir marcas de tiempo cuando hay que reconstruir un índice
+
+assert DTYPE_INDICE.itemsize == TAMANO_REGISTRO
+
+
+def indexar_segmento(mapa, inicio_ms, fin_ms):
+    """Construye el índice de un segmento MJPEG buscando SOI/EOI en el mapa de memoria.
+
+    Sin marcas de tiempo guardadas, los frames se reparten de forma uniforme
+    entre el inicio y el fin del segmento.
+    """
+    offsets = []
+    longitudes = []
+    pos = 0
+    while True:
+        soi = mapa.find(SOI, pos)
+        if soi == -1:
+            break
+        eoi = mapa.find(EOI, soi + 2)
+        if eoi == -1:
+            break
+        offsets.append(soi)
+        longitudes.append(eoi + 2 - soi)
+        pos = eoi + 2
+
+    indice = np.empty(len(offsets), dtype=DTYPE_INDICE)
+    indice["offset"] = offsets
+    indice["longitud"] = longitudes
+    if fin_ms <= inicio_ms:
+        fin_ms = inicio_ms + len(offsets) * 1000 // FPS_SUPUESTO
+    indice["ms"] = np.linspace(inicio_ms, fin_ms, len(offsets), endpoint=False, dtype=np.int64)
+    return indice
+
+
+class ArchivoGrabado:
+    """Grabación MJPEG (segmentos .mjpeg + índices .idx) abierta con mmap.
+
+    Nada se carga en RAM salvo los índices: `jpeg(i)` devuelve una memoryview
+    sobre el mapa del segmento y `indice_en(ms)` busca en O(log n). Si a un
+    segmento le falta el índice se construye al abrirlo y se guarda en disco.
+    """
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        if os.path.isdir(ruta):
+            nombres = [os.path.join(ruta, n) for n in os.listdir(ruta) if n.endswith(EXTENSION_SEGMENTO)]
+        else:
+            nombres = [ruta]
+        nombres.sort(key=self._inicio_segmento)
+
+        self._ficheros = []
+        self._mapas = []
+        self._vistas = []
+        indices = []
+        segmentos = []
+        for nombre in nombres:
+            if os.path.getsize(nombre) == 0:
+                continue
+            f = open(nombre, "rb")
+            mapa = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            indice = self._cargar_indice(nombre, mapa)
+            if not len(indice):
+                mapa.close()
+                f.close()
+                continue
+            segmentos.append(np.full(len(indice), len(self._mapas), dtype=np.uint16))
+            indices.append(indice)
+            self._ficheros.append(f)
+            self._mapas.append(mapa)
+            self._vistas.append(memoryview(mapa))
+
+        if indices:
+            indice = np.concatenate(indices)
+            segmento = np.concatenate(segmentos)
+        else:
+            indice = np.empty(0, dtype=DTYPE_INDICE)
+            segmento = np.empty(0, dtype=np.uint16)
+        if len(indice) > 1 and np.any(np.diff(indice["ms"]) < 0):
+            orden = np.argsort(indice["ms"], kind="stable")
+            indice, segmento = indice[orden], segmento[orden]
+
+        self.ms = np.ascontiguousarray(indice["ms"])
+        self._offsets = indice["offset"]
+        self._longitudes = indice["longitud"]
+        self._segmento = segmento
+        print(f"🎞️ {ruta}: {len(self)} frames en {len(self._mapas)} segmento(s)")
+
+    @staticmethod
+    def _inicio_segmento(nombre):
+        base = os.path.splitext(os.path.basename(nombre))[0]
+        return int(base) if base.isdigit() else int(os.path.getmtime(nombre) * 1000)
+
+    def _cargar_indice(self, nombre, mapa):
+        ruta_indice = os.path.splitext(nombre)[0] + EXTENSION_INDICE
+        if os.path.exists(ruta_indice):
+            registros = os.path.getsize(ruta_indice) // TAMANO_REGISTRO
+            indice = np.fromfile(ruta_indice, dtype=DTYPE_INDICE, count=registros)
+            # Un segmento que aún se está grabando puede tener el índice por delante del dato
+            return indice[indice["offset"] + indice["longitud"] <= len(mapa)]
+
+        print(f"🔎 Construyendo índice de {nombre}...")
+        indice = indexar_segmento(mapa, self._inicio_segmento(nombre), int(os.path.getmtime(nombre) * 1000))
+        try:
+            indice.tofile(ruta_indice)
+        except OSError as e:
+            print(f"⚠️ No se pudo guardar el índice: {e}")
+        return indice
+
+    def __len__(self):
+        return len(self.ms)
+
+    @property
+    def inicio_ms(self):
+        return int(self.ms[0]) if len(self.ms) else 0
+
+    @property
+    def fin_ms(self):
+        return int(self.ms[-1]) if len(self.ms) else 0
+
+    def marca_tiempo(self, i):
+        return int(self.ms[i])
+
+    def indice_en(self, ms):
+        """Último frame con marca de tiempo <= ms"""
+        i = int(np.searchsorted(self.ms, ms, side="right")) - 1
+        return min(max(i, 0), len(self.ms) - 1)
+
+    def jpeg(self, i):
+        offset = int(self._offsets[i])
+        return self._vistas[self._segmento[i]][offset:offset + int(self._longitudes[i])]
+
+    def cerrar(self):
+        for vista in self._vistas:
+            vista.release()
+        for mapa in self._mapas:
+            try:
+                mapa.close()
+            except BufferError:
+                # Aún hay un JPEG en uso: el mapa se libera cuando se suelte
+                pass
+        for f in self._ficheros:
+            f.close()
+        self._vistas = []
+        self._mapas = []
+        self._ficheros = []
@@ -0,0 +1,125 @@
+# BufferJitter.py
+import math
+import time
+from collections import deque
+from Entorno import numero_en_rango, valor_entorno
+from PyQt6.QtCore import QObject, QTimer, Qt
+
+LATENCIA_MAXIMA_MS = 150  # objetivo máximo por defecto (DETECTORCAM_JITTER_MS)
+VENTANA_CADENCIA = 32  # llegadas con las que se mide el intervalo medio entre frames
+ALFA_JITTER = 1 / 16  # como el estimador de jitter de RTP (RFC 3550)
+FACTOR_JITTER = 3.0  # latencia objetivo = FACTOR_JITTER * jitter medio
+PASO_CRECIMIENTO = 0.25  # fracción del intervalo que puede crecer el objetivo por frame
+INTERVALO_INICIAL_MS = 40.0
+FPS_MAXIMO_COLA = 60  # cadencia más alta prevista, para dimensionar la cola del hilo de video
+
+
+class BufferJitter(QObject):
+    """Presenta los frames de un stream a ritmo constante aunque lleguen a ráfagas.
+
+    Cada frame se encola con su instante de llegada (`FrameListo.llegada`) y
+    un QTimer presenta uno por tick con el intervalo medio entre llegadas.
+    La latencia objetivo sigue al jitter observado, con `maximo_ms` como
+    tope; con jitter bajo los frames se presentan en cuanto llegan. Si en un
+    tick no hay frame (underrun) se vuelve al modo de mínima latencia: el
+    siguiente frame se muestra nada más llegar y el colchón se rehace desde
+    ahí. `presentar(frame)` se llama en el hilo de la GUI y se encarga
+    también de liberar el frame; los descartados van a `descartar(frame)`.
+    """
+
+    def __init__(self, presentar, descartar, maximo_ms=LATENCIA_MAXIMA_MS, parent=None):
+        super().__init__(parent)
+        self.presentar = presentar
+        self.descartar = descartar
+        self.maximo = maximo_ms / 1000.0
+        self._cola = deque()
+        self._llegadas = deque(maxlen=VENTANA_CADENCIA)
+        self.intervalo = INTERVALO_INICIAL_MS / 1000.0
+        self.jitter = 0.0
+        self.objetivo = 0.0
+        self.directo = True
+        self.underruns = 0
+        self.descartados = 0
+        self._timer = QTimer(self)
+        self._timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self._timer.timeout.connect(self._tick)
+
+    @classmethod
+    def desde_entorno(cls, presentar, descartar, parent=None):
+        """Buffer si DETECTORCAM_JITTER_MS > 0 (latencia máxima en ms); si no o no es válido, None"""
+        maximo_ms = valor_entorno("DETECTORCAM_JITTER_MS", 0, numero_en_rango(0))
+        if maximo_ms <= 0:
+            return None
+        return cls(presentar, descartar, maximo_ms, parent)
+
+    def profundidad(self):
+        """JPEG que el hilo de video debe poder encolar para que una ráfaga de hasta `maximo` llegue entera"""
+        return math.ceil(self.maximo * FPS_MAXIMO_COLA) + 1
+
+    def agregar(self, frame):
+        self._medir_llegada(frame.llegada)
+        if self.directo:
+            # Tras un underrun el primer frame se muestra ya; con poco jitter se
+            # sigue así, sin colchón
+            self.directo = self.objetivo < self.intervalo / 2
+            self.presentar(frame)
+            return
+        self._cola.append(frame)
+        # Más frames de los que caben en el objetivo: se tiran los más viejos
+        while len(self._cola) > 1 and (len(self._cola) - 1) * self.intervalo > self.objetivo + self.intervalo:
+            self.descartados += 1
+            self.descartar(self._cola.popleft())
+        if not self._timer.isActive():
+            self._timer.start(self._intervalo_ms())
+
+    def _medir_llegada(self, llegada):
+        if self._llegadas:
+            delta = llegada - self._llegadas[-1]
+            if delta > 4 * max(self.intervalo, 0.05):
+                # Hueco largo (cámara caída, reconexión): no cuenta como cadencia
+                self._llegadas.clear()
+            else:
+                self.jitter += (abs(delta - self.intervalo) - self.jitter) * ALFA_JITTER
+        self._llegadas.append(llegada)
+        if len(self._llegadas) > 1:
+            # Media sobre una ventana, no entre llegadas sueltas: en una ráfaga casi son 0
+            self.intervalo = max(0.001, (self._llegadas[-1] - self._llegadas[0]) / (len(self._llegadas) - 1))
+        objetivo = min(self.maximo, FACTOR_JITTER * self.jitter)
+        if objetivo > self.objetivo:
+            # Crece despacio para no congelar la imagen de golpe; baja enseguida
+            objetivo = min(objetivo, self.objetivo + self.intervalo * PASO_CRECIMIENTO)
+        self.objetivo = objetivo
+
+    def _intervalo_ms(self):
+        # Se acelera o frena hasta un 10% para mantener la cola en el objetivo
+        # sin que la diferencia de reloj con la cámara la vacíe o la llene
+        profundidad = self.objetivo / self.intervalo
+        ajuste = (profundidad - len(self._cola)) / max(1.0, profundidad)
+        factor = 1.0 + max(-0.1, min(0.1, 0.1 * ajuste))
+        return max(1, round(self.intervalo * factor * 1000))
+
+    def _tick(self):
+        if not self._cola:
+            self.underruns += 1
+            self.directo = True
+            self._timer.stop()
+            return
+        # Un solo frame que aún no ha esperado el objetivo: se retiene para hacer colchón
+        if len(self._cola) == 1 and time.monotonic() - self._cola[0].llegada < self.objetivo:
+            return
+        self.presentar(self._cola.popleft())
+        self._timer.setInterval(self._intervalo_ms())
+
+    def latencia(self):
+        """Latencia que añade el buffer ahora mismo, en ms"""
+        return len(self._cola) * self.intervalo * 1000.0
+
+    def vaciar(self):
+        """Descarta lo encolado (cambio de cámara o fin del stream) y vuelve al modo directo"""
+        self._timer.stop()
+        while self._cola:
+            self.descartar(self._cola.popleft())
+        self._llegadas.clear()
+        self.jitter = 0.0
+        self.objetivo = 0.0
+        self.directo = True
@@ -0,0 +1,83 @@
+# BufferRepeticion.py
+import bisect
+import threading
+from collections import deque
+from Entorno import numero_positivo, valor_entorno
+
+SEGUNDOS_REPETICION = 60
+MEGAS_REPETICION = 128
+
+
+def limites_desde_entorno():
+    """(segundos, megas) de DETECTORCAM_REPETICION_SEGUNDOS y DETECTORCAM_REPETICION_MB"""
+    return (valor_entorno("DETECTORCAM_REPETICION_SEGUNDOS", SEGUNDOS_REPETICION, numero_positivo),
+            valor_entorno("DETECTORCAM_REPETICION_MB", MEGAS_REPETICION, numero_positivo))
+
+
+class FuenteRepeticion:
+    """Copia congelada del buffer, con la interfaz de fuente de VentanaReproduccion"""
+
+    def __init__(self, marcas, jpegs):
+        self.ms = marcas
+        self.jpegs = jpegs
+
+    def __len__(self):
+        return len(self.ms)
+
+    @property
+    def inicio_ms(self):
+        return self.ms[0] if self.ms else 0
+
+    @property
+    def fin_ms(self):
+        return self.ms[-1] if self.ms else 0
+
+    def marca_tiempo(self, i):
+        return self.ms[i]
+
+    def indice_en(self, ms):
+        i = bisect.bisect_right(self.ms, ms) - 1
+        return min(max(i, 0), len(self.ms) - 1)
+
+    def jpeg(self, i):
+        return self.jpegs[i]
+
+
+class BufferRepeticion:
+    """Anillo con los últimos JPEG comprimidos de una cámara, para repetición instantánea.
+
+    Se limita a la vez por segundos y por bytes, descartando lo más antiguo.
+    Guardar el JPEG en lugar del frame decodificado ocupa un orden de magnitud
+    menos; solo se decodifica lo que se llega a ver.
+    """
+
+    def __init__(self, segundos=SEGUNDOS_REPETICION, megas=MEGAS_REPETICION):
+        self.max_ms = int(segundos * 1000)
+        self.max_bytes = int(megas * 1024 * 1024)
+        self.bytes = 0
+        self._frames = deque()
+        self._lock = threading.Lock()
+
+    def agregar(self, jpg, marca_tiempo):
+        """Receptor de VideoThread: copia el JPEG (la memoryview no sobrevive a la llamada)"""
+        ms = int(marca_tiempo * 1000)
+        datos = bytes(jpg)
+        with self._lock:
+            self._frames.append((ms, datos))
+            self.bytes += len(datos)
+            while self._frames and (self.bytes > self.max_bytes or ms - self._frames[0][0] > self.max_ms):
+                _, viejo = self._frames.popleft()
+                self.bytes -= len(viejo)
+
+    def __len__(self):
+        return len(self._frames)
+
+    def ultimo(self):
+        """(marca_tiempo_ms, jpeg) del último frame recibido, o None si aún no hay"""
+        with self._lock:
+            return self._frames[-1] if self._frames else None
+
+    def instantanea(self):
+        with self._lock:
+            frames = list(self._frames)
+        return FuenteRepeticion([ms for ms, _ in frames], [datos for _, datos in frames])
@@ -0,0 +1,46 @@
+# BuzonFrame.py
+import threading
+
+
+class BuzonFrame:
+    """Buzón de una sola plaza: siempre guarda solo el frame más reciente.
+
+    El hilo de video deposita con `poner()` y la GUI recoge con `tomar()`.
+    Si la GUI no ha recogido el frame anterior, el nuevo lo sustituye y el
+    anterior cuenta como descartado. `al_tomar` se llama cada vez que el
+    buzón queda libre, para que el productor entregue el siguiente.
+    """
+
+    def __init__(self, al_tomar=None):
+        self._lock = threading.Lock()
+        self._frame = None
+        self.descartados = 0
+        self.al_tomar = al_tomar
+
+    def poner(self, frame):
+        """Deposita el frame. Devuelve (avisar, reemplazado).
+
+        `avisar` es True si el buzón estaba vacío, es decir, si hay que
+        notificar a la GUI; si ya había un aviso pendiente no se repite.
+        """
+        with self._lock:
+            reemplazado = self._frame
+            self._frame = frame
+            if reemplazado is not None:
+                self.descartados += 1
+        return reemplazado is None, reemplazado
+
+    def tomar(self):
+        with self._lock:
+            frame = self._frame
+            self._frame = None
+        if frame is not None and self.al_tomar is not None:
+            self.al_tomar()
+        return frame
+
+    def ocupado(self):
+        return self._frame is not None
+
+    def vaciar(self):
+        with self._lock:
+            self._frame = None
@@ -0,0 +1,58 @@
+# CacheLocal.py
+import json
+import os
+import threading
+import time
+
+RUTA_CACHE = "detectorcam_cache.json"
+
+
+class CacheLocal:
+    """Almacén JSON clave -> valor que recuerda cuándo se guardó cada entrada.
+
+    Las entradas no se borran al caducar: `obtener` indica si siguen vigentes
+    y quien llama decide si le sirve un valor viejo cuando falla la red.
+    """
+
+    def __init__(self, ruta=RUTA_CACHE):
+        self.ruta = ruta
+        self._lock = threading.Lock()
+        self._datos = self._leer()
+
+    def _leer(self):
+        try:
+            with open(self.ruta, "r", encoding="utf-8") as f:
+                datos = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return datos if isinstance(datos, dict) else {}
+
+    def obtener(self, clave, ttl=None):
+        """(valor, vigente); (None, False) si no hay entrada. Sin ttl nunca caduca"""
+        with self._lock:
+            entrada = self._datos.get(clave)
+        if entrada is None:
+            return None, False
+        vigente = ttl is None or time.time() - entrada["guardado"] < ttl
+        return entrada["valor"], vigente
+
+    def guardar(self, clave, valor):
+        with self._lock:
+            self._datos[clave] = {"valor": valor, "guardado": time.time()}
+            self._escribir()
+
+    def borrar(self, *claves):
+        with self._lock:
+            for clave in claves:
+                self._datos.pop(clave, None)
+            self._escribir()
+
+    def _escribir(self):
+        # Se escribe aparte y se renombra: un cierre a medias nunca deja el JSON corrupto
+        temporal = self.ruta + ".tmp"
+        try:
+            with open(temporal, "w", encoding="utf-8") as f:
+                json.dump(self._datos, f)
+            os.replace(temporal, self.ruta)
+        except OSError as e:
+            print(f"⚠️ No se pudo guardar la caché {self.ruta}: {e}")
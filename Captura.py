@@ -0,0 +1,53 @@
+# Captura.py
+import os
+import time
+from PyQt6.QtCore import QThread, pyqtSignal
+
+DIRECTORIO_CAPTURAS = "capturas"
+EDAD_MAXIMA_CAPTURA = 5.0  # segundos: un JPEG más viejo es de una cámara que ya no se está recibiendo
+
+
+def nombre_captura(indice, marca_tiempo_ms):
+    instante = time.strftime("%Y%m%d_%H%M%S", time.localtime(marca_tiempo_ms / 1000))
+    return f"camara_{indice + 1}_{instante}_{marca_tiempo_ms % 1000:03d}.jpg"
+
+
+def guardar_captura(directorio, indice, marca_tiempo_ms, jpg):
+    """Escribe el JPEG tal como llegó de la cámara: sin decodificar ni recomprimir.
+
+    Se escribe aparte y se renombra, así nunca queda una captura a medias.
+    Devuelve la ruta del archivo.
+    """
+    os.makedirs(directorio, exist_ok=True)
+    ruta = os.path.join(directorio, nombre_captura(indice, marca_tiempo_ms))
+    temporal = ruta + ".tmp"
+    with open(temporal, "wb") as f:
+        f.write(jpg)
+    os.replace(temporal, ruta)
+    return ruta
+
+
+class HiloCapturas(QThread):
+    """Guarda en disco las capturas de una o varias cámaras sin bloquear la GUI.
+
+    `capturas` es una lista de (índice, marca_tiempo_ms, jpeg) ya copiada en
+    el hilo de la GUI: el hilo solo escribe bytes.
+    """
+    completado = pyqtSignal(list)
+    fallo = pyqtSignal(str)
+
+    def __init__(self, directorio, capturas):
+        super().__init__()
+        self.directorio = directorio
+        self.capturas = capturas
+
+    def run(self):
+        rutas = []
+        try:
+            for indice, marca_tiempo_ms, jpg in self.capturas:
+                rutas.append(guardar_captura(self.directorio, indice, marca_tiempo_ms, jpg))
+                print(f"📸 Captura guardada: {rutas[-1]} ({len(jpg) / 1e3:.0f} KB)")
+        except OSError as e:
+            print(f"❌ No se pudo guardar la captura en {self.directorio}: {e}")
+            self.fallo.emit(str(e))
+        self.completado.emit(rutas)
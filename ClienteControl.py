@@ -0,0 +1,154 @@
+# ClienteControl.py
+import threading
+import time
+import requests
+from ClienteHTTP import cliente_camaras
+from PyQt6.QtCore import QThread, pyqtSignal
+
+ESPERA_ACTIVACION = 15  # segundos máximos esperando a que el servidor marque camara_activa
+ESPERA_INICIAL = 0.1
+ESPERA_MAXIMA_SONDEO = 1.0
+TTL_CAMARAS = 24 * 3600  # la lista de cámaras de un servidor casi nunca cambia
+
+
+class ErrorControl(Exception):
+    def __init__(self, titulo, mensaje):
+        super().__init__(mensaje)
+        self.titulo = titulo
+        self.mensaje = mensaje
+
+
+class ClienteControl:
+    """Llamadas de control al servidor de cámaras.
+
+    Los métodos son bloqueantes: se llaman desde un hilo (ver HiloActivacion),
+    nunca desde la GUI. Con una CacheLocal se recuerda la lista de cámaras
+    de cada servidor.
+    """
+
+    def __init__(self, base_url, cache=None):
+        self.base_url = base_url
+        self.cache = cache
+
+    def activar(self):
+        print("📡 Enviando petición para activar cámaras...")
+        response = cliente_camaras().get(f"{self.base_url}/activar-camara")
+        print(f"📨 Respuesta activar: {response.status_code}")
+        if response.status_code != 200:
+            raise ErrorControl("Error", f"No se pudo activar las cámaras: {response.status_code}")
+
+    def listar_camaras(self):
+        response = cliente_camaras().get(f"{self.base_url}/listar-camaras", timeout=5)
+        print(f"📨 Respuesta lista cámaras: {response.status_code}")
+        if response.status_code != 200:
+            raise ErrorControl("Error", f"No se pudo obtener la lista de cámaras: {response.status_code}")
+        data = response.json()
+        if self.cache is not None and data.get("camaras"):
+            self.cache.guardar(self._clave_camaras(), data["camaras"])
+        return data
+
+    def _clave_camaras(self):
+        return f"camaras {self.base_url}"
+
+    def camaras_en_cache(self):
+        """Lista de cámaras guardada para este servidor, o None si no hay o ha caducado"""
+        if self.cache is None:
+            return None
+        camaras, vigente = self.cache.obtener(self._clave_camaras(), TTL_CAMARAS)
+        return camaras if vigente else None
+
+    def esperar_camaras_activas(self, espera_maxima=ESPERA_ACTIVACION, cancelado=None):
+        """Sondea /listar-camaras con espera creciente hasta que camara_activa sea true.
+
+        Devuelve los últimos datos recibidos aunque se agote la espera, o None
+        si se activa el threading.Event `cancelado` entre dos sondeos.
+        """
+        cancelado = cancelado or threading.Event()
+        limite = time.monotonic() + espera_maxima
+        espera = ESPERA_INICIAL
+        while True:
+            data = self.listar_camaras()
+            if data.get("camara_activa", False) or time.monotonic() + espera > limite:
+                return data
+            if cancelado.wait(espera):
+                return None
+            espera = min(espera * 2, ESPERA_MAXIMA_SONDEO)
+
+    def desactivar(self):
+        cliente_camaras().get(f"{self.base_url}/desactivar-camara", timeout=2)
+
+    def desactivar_en_segundo_plano(self):
+        """Desactiva en un hilo aparte; no es daemon para que al salir la petición llegue a enviarse"""
+        def desactivar():
+            try:
+                self.desactivar()
+                print("📴 Cámaras desactivadas en el servidor")
+            except Exception as e:
+                print(f"⚠️ No se pudo desactivar las cámaras: {e}")
+
+        threading.Thread(target=desactivar, name="desactivar-camaras").start()
+
+
+class HiloActivacion(QThread):
+    """Activa las cámaras y obtiene su lista sin bloquear la GUI.
+
+    Si la lista está en caché se emite `completado` nada más activar (los
+    streams reintentan hasta que el servidor los sirve) y la lista se
+    revalida después; si ha cambiado se emite `lista_actualizada`.
+    """
+    progreso = pyqtSignal(str)
+    completado = pyqtSignal(dict)
+    lista_actualizada = pyqtSignal(dict)
+    fallo = pyqtSignal(str, str)
+
+    def __init__(self, base_url, cache=None):
+        super().__init__()
+        self.cliente = ClienteControl(base_url, cache)
+        self._cancelado = threading.Event()
+        # True tras emitir `completado` con la lista en caché: solo queda revalidarla
+        self.revalidando = False
+
+    def cancelar(self):
+        """Termina en cuanto acabe la petición en curso, sin emitir nada más"""
+        self._cancelado.set()
+
+    def run(self):
+        try:
+            self.progreso.emit("Activando cámaras...")
+            self.cliente.activar()
+            if self._cancelado.is_set():
+                return
+
+            camaras = self.cliente.camaras_en_cache()
+            if camaras:
+                print(f"⚡ Lista de cámaras en caché: {camaras}")
+                self.revalidando = True
+                self.completado.emit({"camaras": camaras, "camara_activa": True})
+            else:
+                self.progreso.emit("Obteniendo lista de cámaras...")
+
+            print("📡 Esperando a que el servidor active las cámaras...")
+            data = self.cliente.esperar_camaras_activas(cancelado=self._cancelado)
+            if data is None or self._cancelado.is_set():
+                print("⏹️ Activación cancelada")
+                return
+            print(f"📋 Datos recibidos: {data}")
+            if not camaras:
+                self.completado.emit(data)
+            elif data.get("camaras") != camaras:
+                self.lista_actualizada.emit(data)
+        except ErrorControl as e:
+            print(f"❌ {e.mensaje}")
+            self.fallo.emit(e.titulo, e.mensaje)
+        except requests.exceptions.Timeout:
+            error_msg = "Tiempo de espera agotado al conectar con el servidor"
+            print(f"⏰ {error_msg}")
+            self.fallo.emit("Error de conexión", error_msg)
+        except requests.exceptions.ConnectionError:
+            error_msg = "No se pudo conectar con el servidor de cámaras"
+            print(f"🔌 {error_msg}")
+            self.fallo.emit("Error de conexión", error_msg)
+        except Exception as e:
+            error_msg = f"Error inesperado: {str(e)}"
+            print(f"💥 {error_msg}")
+            self.fallo.emit("Error", error_msg)
@@ -0,0 +1,98 @@
+# ClienteHTTP.py
+import functools
+import threading
+
+TIMEOUT_CONEXION = 5  # segundos para abrir la conexión TCP/TLS
+TIMEOUT_LECTURA = 20  # segundos sin recibir nada antes de dar la petición por perdida
+TIMEOUT = (TIMEOUT_CONEXION, TIMEOUT_LECTURA)
+TIMEOUT_API = (TIMEOUT_CONEXION, 60)  # la API en frío puede tardar en despertar
+TIMEOUT_STREAM = (TIMEOUT_CONEXION, 10)
+REINTENTOS = 2
+ESPERA_REINTENTO = 0.3  # backoff de urllib3: 0.3s, 0.6s...
+TAMANO_POOL = 32  # conexiones por host: streams del mosaico, reservas y control a la vez
+
+_adaptador_api = None
+_cookies_api = None
+_clientes_api = threading.local()
+_adaptador_camaras = None
+_clientes_camaras = threading.local()
+_lock = threading.Lock()
+
+
+def cliente_http():
+    """Sesión HTTP de la API para el hilo que llama, creada al primer uso.
+
+    requests.Session no es segura entre hilos, así que cada hilo (la GUI,
+    HiloVerificacion...) tiene la suya. Todas montan el mismo adaptador, con
+    un pool de conexiones keep-alive por host para no repetir el handshake
+    TCP+TLS, y comparten un único tarro de cookies: el del inicio de sesión
+    que `Sesion` guarda en disco (CookieJar protege su estado con su propio
+    lock). Los errores de conexión y los 502/503/504 de peticiones
+    idempotentes se reintentan con espera creciente, y toda petición lleva
+    timeout salvo que se indique otro.
+    """
+    global _adaptador_api, _cookies_api
+    sesion = getattr(_clientes_api, "sesion", None)
+    if sesion is None:
+        with _lock:
+            if _adaptador_api is None:
+                from requests.cookies import RequestsCookieJar
+                _adaptador_api = _crear_adaptador()
+                _cookies_api = RequestsCookieJar()
+        sesion = _clientes_api.sesion = _crear_sesion(_adaptador_api, _cookies_api)
+    return sesion
+
+
+def cliente_camaras():
+    """Sesión HTTP para el servidor de cámaras (streams y control), una por hilo.
+
+    Como en `cliente_http()`, todas montan el mismo adaptador y comparten su
+    pool de conexiones keep-alive a través del túnel. Cada una tiene sus
+    propias cookies: no se mezclan con las de la API ni acaban en la caché.
+    """
+    global _adaptador_camaras
+    sesion = getattr(_clientes_camaras, "sesion", None)
+    if sesion is None:
+        with _lock:
+            if _adaptador_camaras is None:
+                _adaptador_camaras = _crear_adaptador()
+        sesion = _clientes_camaras.sesion = _crear_sesion(_adaptador_camaras)
+    return sesion
+
+
+@functools.cache
+def _clase_sesion():
+    import requests
+
+    class SesionHTTP(requests.Session):
+        """requests.Session con `TIMEOUT` en toda petición que no indique otro"""
+
+        def request(self, method, url, **kwargs):
+            kwargs.setdefault("timeout", TIMEOUT)
+            return super().request(method, url, **kwargs)
+
+    return SesionHTTP
+
+
+def _crear_adaptador():
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    reintentos = Retry(
+        total=REINTENTOS,
+        read=0,  # una lectura cortada a medias no se repite: puede ser un stream
+        status_forcelist=(502, 503, 504),
+        allowed_methods=frozenset(["GET", "HEAD"]),
+        backoff_factor=ESPERA_REINTENTO,
+        raise_on_status=False,
+    )
+    return HTTPAdapter(pool_connections=TAMANO_POOL, pool_maxsize=TAMANO_POOL, max_retries=reintentos)
+
+
+def _crear_sesion(adaptador, cookies=None):
+    sesion = _clase_sesion()()
+    sesion.mount("http://", adaptador)
+    sesion.mount("https://", adaptador)
+    if cookies is not None:
+        sesion.cookies = cookies
+    return sesion
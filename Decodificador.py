@@ -0,0 +1,121 @@
+# Decodificador.py
+import zlib
+import cv2
+import numpy as np
+
+# Marcadores SOF (C0-CF salvo DHT C4, JPG C8 y DAC CC) que llevan el tamaño de la imagen
+MARCADORES_SOF = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+# Decodificación reducida en el dominio DCT: (factor, flag de imdecode)
+REDUCCIONES = (
+    (8, cv2.IMREAD_REDUCED_COLOR_8),
+    (4, cv2.IMREAD_REDUCED_COLOR_4),
+    (2, cv2.IMREAD_REDUCED_COLOR_2),
+)
+FLAGS_REDUCCION = dict(REDUCCIONES)
+
+# Huella de un JPEG: trozos repartidos por todo el fichero más la cola
+MUESTRAS_HUELLA = 64
+TAMANO_MUESTRA = 32
+TAMANO_COLA = 1024
+
+
+def dimensiones_jpeg(jpg):
+    """Lee (ancho, alto) de la cabecera SOF sin decodificar. None si no la encuentra"""
+    n = len(jpg)
+    i = 2
+    while i + 9 < n:
+        if jpg[i] != 0xFF:
+            return None
+        marcador = jpg[i + 1]
+        if marcador == 0xFF:
+            i += 1
+            continue
+        if marcador in MARCADORES_SOF:
+            alto = (jpg[i + 5] << 8) | jpg[i + 6]
+            ancho = (jpg[i + 7] << 8) | jpg[i + 8]
+            return ancho, alto
+        if marcador == 0xDA:
+            return None
+        i += 2 + ((jpg[i + 2] << 8) | jpg[i + 3])
+    return None
+
+
+def huella_jpeg(jpg):
+    """(longitud, crc32 de una muestra de los bytes) para reconocer un JPEG repetido sin decodificarlo.
+
+    La muestra cubre unos 3 KB sea cual sea el tamaño del frame, así que
+    cuesta microsegundos. Dos frames distintos casi nunca coinciden en
+    longitud, y si coinciden los datos comprimidos cambian por todo el fichero.
+    """
+    n = len(jpg)
+    paso = max(n // MUESTRAS_HUELLA, TAMANO_MUESTRA)
+    crc = 0
+    for i in range(0, n, paso):
+        crc = zlib.crc32(jpg[i:i + TAMANO_MUESTRA], crc)
+    return n, zlib.crc32(jpg[-TAMANO_COLA:], crc)
+
+
+class Decodificador:
+    """Decodifica JPEG y deja la imagen en RGB ya encajada en el widget destino.
+
+    Se usa desde el hilo de video para que la GUI solo tenga que pintar.
+    El tamaño destino se actualiza con `set_tamano_destino()` cada vez que
+    el widget cambia de tamaño, y con él el factor de decodificación
+    reducida: solo se decodifica a resolución completa si hace falta.
+    """
+
+    def __init__(self, ancho=0, alto=0):
+        self.tamano_destino = (ancho, alto)
+        self.factor = 1
+
+    def set_tamano_destino(self, ancho, alto):
+        self.tamano_destino = (ancho, alto)
+
+    def factor_reduccion(self, ancho_origen, alto_origen):
+        """Mayor factor 1/2, 1/4 u 1/8 que aún llena el tamaño destino al encajar la imagen"""
+        ancho, alto = self.tamano_destino
+        if ancho <= 0 or alto <= 0 or ancho_origen <= 0 or alto_origen <= 0:
+            return 1
+        escala = min(ancho / ancho_origen, alto / alto_origen)
+        for factor, _ in REDUCCIONES:
+            if escala * factor <= 1:
+                return factor
+        return 1
+
+    def decodificar(self, jpg, reduccion_minima=1):
+        dimensiones = dimensiones_jpeg(jpg)
+        factor = self.factor_reduccion(*dimensiones) if dimensiones else 1
+        factor = max(factor, reduccion_minima)
+        if factor != self.factor:
+            print(f"🔍 Decodificación a 1/{factor} de resolución")
+            self.factor = factor
+        flag = FLAGS_REDUCCION.get(factor, cv2.IMREAD_COLOR)
+        return cv2.imdecode(np.frombuffer(jpg, dtype=np.uint8), flag)
+
+    def renderizar(self, frame):
+        """Escala para encajar en el destino conservando la proporción y convierte a RGB"""
+        return cv2.cvtColor(self.escalar(frame), cv2.COLOR_BGR2RGB)
+
+    def tamano_salida(self, ancho_origen, alto_origen):
+        """(ancho, alto) que tendrá un frame de ese tamaño tras `escalar()`"""
+        ancho, alto = self.tamano_destino
+        if ancho <= 0 or alto <= 0:
+            return ancho_origen, alto_origen
+        escala = min(ancho / ancho_origen, alto / alto_origen)
+        return max(1, round(ancho_origen * escala)), max(1, round(alto_origen * escala))
+
+    def escalar(self, frame):
+        """Escala el frame BGR para encajarlo en el destino conservando la proporción"""
+        h, w = frame.shape[:2]
+        nuevo_w, nuevo_h = self.tamano_salida(w, h)
+        if (nuevo_w, nuevo_h) != (w, h):
+            interpolacion = cv2.INTER_AREA if nuevo_w < w else cv2.INTER_LINEAR
+            frame = cv2.resize(frame, (nuevo_w, nuevo_h), interpolation=interpolacion)
+        return frame
+
+    def procesar(self, jpg, reduccion_minima=1):
+        frame = self.decodificar(jpg, reduccion_minima)
+        if frame is None:
+            return None
+        return self.renderizar(frame)
@@ -0,0 +1,115 @@
+# DetectorMovimiento.py
+import time
+import cv2
+import numpy as np
+from Entorno import numero_en_rango, valor_entorno
+
+UMBRAL = 25  # diferencia de gris (0-255) para considerar que un píxel cambió
+AREA_MINIMA = 0.002  # fracción de la imagen que debe ocupar una zona con movimiento
+ALFA_FONDO = 0.05  # velocidad de adaptación del fondo
+FPS_ANALISIS = 5
+ANCHO_MAXIMO = 320  # el análisis nunca trabaja por encima de este ancho
+
+
+def rois_desde_texto(texto):
+    """'x,y,w,h;x,y,w,h' en fracciones de la imagen -> lista de tuplas.
+
+    ValueError si una zona no tiene cuatro números entre 0 y 1 o está vacía.
+    """
+    rois = []
+    for parte in (texto or "").split(";"):
+        if parte.strip():
+            roi = tuple(float(v) for v in parte.split(","))
+            if len(roi) != 4 or not all(0 <= v <= 1 for v in roi) or roi[2] <= 0 or roi[3] <= 0:
+                raise ValueError(f"zona no válida: {parte.strip()!r}")
+            rois.append(roi)
+    return rois
+
+
+class DetectorMovimiento:
+    """Detección de movimiento sobre una decodificación muy reducida en escala de grises.
+
+    Mantiene un fondo como media móvil y compara cada frame con él usando
+    operaciones vectorizadas de NumPy. Las cajas se devuelven en fracciones
+    de la imagen (x, y, ancho, alto) para no depender de la resolución.
+    """
+
+    def __init__(self, umbral=UMBRAL, area_minima=AREA_MINIMA, alfa=ALFA_FONDO,
+                 rois=None, fps_analisis=FPS_ANALISIS):
+        self.umbral = umbral
+        self.area_minima = area_minima
+        self.alfa = alfa
+        self.rois = rois or []
+        self.fps_analisis = fps_analisis
+        self._fondo = None
+        self._mascara_rois = None
+        self._ultimo_analisis = 0.0
+        self.tiempo_ms = 0.0
+
+    @classmethod
+    def desde_entorno(cls):
+        return cls(
+            umbral=valor_entorno("DETECTORCAM_MOVIMIENTO_UMBRAL", UMBRAL, numero_en_rango(0, 255)),
+            area_minima=valor_entorno("DETECTORCAM_MOVIMIENTO_AREA", AREA_MINIMA, numero_en_rango(0, 1)),
+            rois=valor_entorno("DETECTORCAM_MOVIMIENTO_ROIS", [], rois_desde_texto),
+        )
+
+    def toca_analizar(self):
+        return time.monotonic() - self._ultimo_analisis >= 1.0 / self.fps_analisis
+
+    def analizar(self, jpg):
+        """Devuelve la lista de cajas con movimiento, o None si el JPEG no se pudo decodificar"""
+        self._ultimo_analisis = time.monotonic()
+        t0 = time.perf_counter()
+        gris = cv2.imdecode(np.frombuffer(jpg, dtype=np.uint8), cv2.IMREAD_REDUCED_GRAYSCALE_8)
+        if gris is None:
+            return None
+        if gris.shape[1] > ANCHO_MAXIMO:
+            paso = -(-gris.shape[1] // ANCHO_MAXIMO)
+            gris = gris[::paso, ::paso]
+        gris = gris.astype(np.float32)
+
+        if self._fondo is None or self._fondo.shape != gris.shape:
+            self._fondo = gris
+            self._mascara_rois = self._crear_mascara(gris.shape)
+            return []
+
+        cambio = np.abs(gris - self._fondo) > self.umbral
+        self._fondo += self.alfa * (gris - self._fondo)
+        if self._mascara_rois is not None:
+            cambio &= self._mascara_rois
+
+        cajas = self._cajas(cambio)
+        self.tiempo_ms = (time.perf_counter() - t0) * 1000.0
+        return cajas
+
+    def _crear_mascara(self, forma):
+        if not self.rois:
+            return None
+        alto, ancho = forma
+        mascara = np.zeros(forma, dtype=bool)
+        for x, y, w, h in self.rois:
+            mascara[int(y * alto):int((y + h) * alto), int(x * ancho):int((x + w) * ancho)] = True
+        return mascara
+
+    def _cajas(self, cambio):
+        if not cambio.any():
+            return []
+        alto, ancho = cambio.shape
+        mascara = cv2.dilate(cambio.view(np.uint8), None, iterations=2)
+        n, _, stats, _ = cv2.connectedComponentsWithStats(mascara, connectivity=8)
+        area_minima = self.area_minima * alto * ancho
+        cajas = []
+        for x, y, w, h, area in stats[1:n]:
+            if area >= area_minima:
+                cajas.append((int(x) / ancho, int(y) / alto, int(w) / ancho, int(h) / alto))
+        return cajas
+
+
+def dibujar_cajas(frame, cajas):
+    """Marca las cajas (en fracciones) sobre un frame BGR antes de escalarlo"""
+    alto, ancho = frame.shape[:2]
+    grosor = max(2, ancho // 300)
+    for x, y, w, h in cajas:
+        cv2.rectangle(frame, (int(x * ancho), int(y * alto)),
+                      (int((x + w) * ancho), int((y + h) * alto)), (0, 0, 255), grosor)
@@ -0,0 +1,52 @@
+# Entorno.py
+import math
+import os
+
+
+def valor_entorno(variable, defecto, convertir=float):
+    """`convertir(texto)` de la variable de entorno; si falta o no es válida, `defecto`.
+
+    Un valor no válido (ValueError de `convertir`) se avisa por consola en
+    lugar de propagarse: estas variables se leen a menudo desde un slot de
+    la GUI, donde una excepción cerraría la aplicación.
+    """
+    texto = os.environ.get(variable, "").strip()
+    if not texto:
+        return defecto
+    try:
+        return convertir(texto)
+    except ValueError as e:
+        print(f"⚠️ {variable}={texto!r} no es válido ({e}), se usa {defecto}")
+        return defecto
+
+
+def numero_en_rango(minimo, maximo=math.inf, entero=False):
+    """Conversor para `valor_entorno`: número finito en [minimo, maximo], entero si se pide"""
+    def convertir(texto):
+        valor = int(texto) if entero else float(texto)
+        if not (math.isfinite(valor) and minimo <= valor <= maximo):
+            raise ValueError(f"fuera de [{minimo}, {maximo}]")
+        return valor
+    return convertir
+
+
+def numero_positivo(texto):
+    """Conversor para `valor_entorno`: número finito mayor que 0"""
+    valor = float(texto)
+    if not (math.isfinite(valor) and valor > 0):
+        raise ValueError("debe ser mayor que 0")
+    return valor
+
+
+VERDADEROS = {"1", "true", "yes", "on", "si", "sí"}
+FALSOS = {"0", "false", "no", "off"}
+
+
+def booleano(texto):
+    """Conversor para `valor_entorno`: 1/true/yes/on/sí o 0/false/no/off, sin distinguir mayúsculas"""
+    texto = texto.lower()
+    if texto in VERDADEROS:
+        return True
+    if texto in FALSOS:
+        return False
+    raise ValueError("se esperaba 1/0, true/false, yes/no u on/off")
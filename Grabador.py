@@ -0,0 +1,166 @@
+# Grabador.py - grabación headless de las cámaras, guardando los JPEG tal cual llegan
+import argparse
+import getpass
+import os
+import signal
+import struct
+import sys
+import time
+
+# Índice de cada segmento: por frame, (marca de tiempo en ms, offset, longitud)
+FORMATO_INDICE = "<qQI"
+TAMANO_REGISTRO = struct.calcsize(FORMATO_INDICE)
+EXTENSION_SEGMENTO = ".mjpeg"
+EXTENSION_INDICE = ".idx"
+DURACION_SEGMENTO = 300  # segundos
+INTERVALO_VOLCADO = 2.0  # segundos entre flush a disco
+
+
+class Grabador:
+    """Escribe los JPEG de una cámara en segmentos concatenados, sin decodificar ni recodificar.
+
+    Cada segmento `<inicio_ms>.mjpeg` tiene al lado un índice `<inicio_ms>.idx`
+    con un registro fijo por frame, para poder buscar por marca de tiempo sin
+    recorrer el video.
+    """
+
+    def __init__(self, directorio, duracion_segmento=DURACION_SEGMENTO):
+        self.directorio = directorio
+        self.duracion_segmento = duracion_segmento
+        self.frames = 0
+        self.bytes = 0
+        self._datos = None
+        self._indice = None
+        self._offset = 0
+        self._fin_segmento = 0.0
+        self._proximo_volcado = 0.0
+        os.makedirs(directorio, exist_ok=True)
+
+    def escribir(self, jpg, marca_tiempo):
+        try:
+            if self._datos is None or marca_tiempo >= self._fin_segmento:
+                self._abrir_segmento(marca_tiempo)
+            self._datos.write(jpg)
+            self._indice.write(struct.pack(FORMATO_INDICE, int(marca_tiempo * 1000), self._offset, len(jpg)))
+            self._offset += len(jpg)
+            self.frames += 1
+            self.bytes += len(jpg)
+            if marca_tiempo >= self._proximo_volcado:
+                self._datos.flush()
+                self._indice.flush()
+                self._proximo_volcado = marca_tiempo + INTERVALO_VOLCADO
+        except OSError as e:
+            print(f"❌ Error escribiendo en {self.directorio}: {e}")
+
+    def _abrir_segmento(self, marca_tiempo):
+        self.cerrar()
+        nombre = os.path.join(self.directorio, str(int(marca_tiempo * 1000)))
+        # El índice se escribe después del dato: un índice nunca apunta a bytes sin escribir
+        self._datos = open(nombre + EXTENSION_SEGMENTO, "wb")
+        self._indice = open(nombre + EXTENSION_INDICE, "wb")
+        self._offset = 0
+        self._fin_segmento = marca_tiempo + self.duracion_segmento
+        print(f"📼 Nuevo segmento: {nombre}{EXTENSION_SEGMENTO}")
+
+    def cerrar(self):
+        for f in (self._datos, self._indice):
+            if f is not None:
+                f.close()
+        self._datos = None
+        self._indice = None
+
+
+def iniciar_sesion_headless(sesion, usuario):
+    password = getpass.getpass(f"Contraseña de {usuario}: ")
+    response = sesion.login(usuario, password)
+    if response.status_code != 200:
+        print(f"❌ {response.json().get('detail', 'Credenciales inválidas')}")
+        return False
+    return True
+
+
+def main_grabacion(argv):
+    parser = argparse.ArgumentParser(prog="main.py grabar",
+                                     description="Graba las cámaras sin interfaz, guardando los JPEG sin recodificar")
+    parser.add_argument("directorio", help="carpeta donde se crean las subcarpetas camara_<n>")
+    parser.add_argument("--camaras", help="índices separados por comas (por defecto, todas)")
+    parser.add_argument("--segmento", type=int, default=DURACION_SEGMENTO, help="segundos por segmento")
+    parser.add_argument("--usuario", help="iniciar sesión con este usuario en lugar de usar la sesión guardada")
+    parser.add_argument("--url", help="URL del servidor de cámaras (omite /check-auth)")
+    args = parser.parse_args(argv)
+
+    from PyQt6.QtCore import QCoreApplication, QTimer
+    from ClienteControl import ClienteControl, ErrorControl
+    from Sesion import Sesion, datos_servidor, url_base_servidor
+    from VideoThread import VideoThread, esperar_detenidos
+
+    if args.url:
+        base_url = args.url.rstrip("/")
+    else:
+        sesion = Sesion()
+        if args.usuario and not iniciar_sesion_headless(sesion, args.usuario):
+            return 1
+        data = sesion.check_auth()
+        if data is None:
+            print("❌ No hay sesión iniciada: usa --usuario o inicia sesión desde la aplicación")
+            return 1
+        if data.get("tipo") != "cliente":
+            print("❌ Solo los usuarios tipo 'cliente' pueden usar esta aplicación.")
+            return 1
+        base_url = url_base_servidor(*datos_servidor(data))
+
+    cliente = ClienteControl(base_url)
+    try:
+        cliente.activar()
+        data = cliente.esperar_camaras_activas()
+    except ErrorControl as e:
+        print(f"❌ {e.mensaje}")
+        return 1
+    except Exception as e:
+        print(f"🔌 No se pudo conectar con el servidor de cámaras: {e}")
+        return 1
+
+    num_camaras = len(data.get("camaras", []))
+    if not num_camaras or not data.get("camara_activa", False):
+        print("❌ El servidor no tiene cámaras activas")
+        return 1
+    indices = [int(i) for i in args.camaras.split(",")] if args.camaras else range(num_camaras)
+
+    app = QCoreApplication(sys.argv[:1])
+    hilos = []
+    grabadores = []
+    for i in indices:
+        grabador = Grabador(os.path.join(args.directorio, f"camara_{i}"), args.segmento)
+        # Inactivo: el hilo solo parsea, nunca decodifica
+        hilo = VideoThread(f"{base_url}/video/{i}", activo=False, reconectar=True)
+        hilo.agregar_receptor(grabador.escribir)
+        hilo.start()
+        hilos.append(hilo)
+        grabadores.append(grabador)
+        print(f"🎥 Grabando cámara {i + 1} en {grabador.directorio}")
+
+    signal.signal(signal.SIGINT, lambda *_: app.quit())
+    signal.signal(signal.SIGTERM, lambda *_: app.quit())
+    # Despierta periódicamente el intérprete para que lleguen las señales de Python
+    timer = QTimer()
+    timer.timeout.connect(lambda: None)
+    timer.start(250)
+    inicio = time.monotonic()
+    app.exec()
+
+    for hilo in hilos:
+        hilo.stop()
+    # stop() no espera: el grabador no se cierra mientras un hilo pueda escribir en él
+    esperar_detenidos()
+    for grabador in grabadores:
+        grabador.cerrar()
+    try:
+        cliente.desactivar()
+    except Exception:
+        pass
+
+    segundos = time.monotonic() - inicio
+    for grabador in grabadores:
+        print(f"💾 {grabador.directorio}: {grabador.frames} frames, "
+              f"{grabador.bytes / 1e6:.1f} MB en {segundos:.0f}s")
+    return 0
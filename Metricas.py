@@ -0,0 +1,184 @@
+# Metricas.py
+import bisect
+import csv
+import json
+import os
+import time
+from Entorno import numero_en_rango, valor_entorno
+
+# Límites superiores (ms) de los cubos de los histogramas
+LIMITES_MS = (0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, float("inf"))
+PERIODO_METRICAS = 1.0  # segundos entre muestras (DETECTORCAM_METRICAS_PERIODO)
+PERIODO_MINIMO_METRICAS = 0.1  # por debajo el timer ocuparía el hilo de la GUI
+
+CAMPOS = (
+    "marca_tiempo", "stream", "bytes_red_s", "fps_parseados", "fps_decodificados",
+    "fps_mostrados", "fps_repetidos", "ahorrado_ms_s", "descartados", "reconexiones",
+    "tiempo_caido_s",
+    "decodificacion_p50_ms", "decodificacion_p95_ms",
+    "escalado_p50_ms", "escalado_p95_ms",
+    "edad_p50_ms", "edad_p95_ms",
+)
+
+
+def periodo_desde_entorno():
+    """Segundos entre muestras de DETECTORCAM_METRICAS_PERIODO, como mínimo PERIODO_MINIMO_METRICAS"""
+    periodo = valor_entorno("DETECTORCAM_METRICAS_PERIODO", PERIODO_METRICAS, numero_en_rango(0))
+    if periodo < PERIODO_MINIMO_METRICAS:
+        print(f"⚠️ DETECTORCAM_METRICAS_PERIODO={periodo} es demasiado corto, se usa {PERIODO_MINIMO_METRICAS}")
+        periodo = PERIODO_MINIMO_METRICAS
+    return periodo
+
+
+class Histograma:
+    """Histograma de cubos fijos en milisegundos"""
+
+    def __init__(self):
+        self.cubos = [0] * len(LIMITES_MS)
+        self.cuenta = 0
+        self.suma = 0.0
+        self.maximo = 0.0
+
+    def registrar(self, valor_ms):
+        self.cubos[bisect.bisect_left(LIMITES_MS, valor_ms)] += 1
+        self.cuenta += 1
+        self.suma += valor_ms
+        if valor_ms > self.maximo:
+            self.maximo = valor_ms
+
+    def percentil(self, p):
+        """Límite superior del cubo que contiene el percentil p (0-100)"""
+        if not self.cuenta:
+            return 0.0
+        objetivo = self.cuenta * p / 100.0
+        acumulado = 0
+        for limite, n in zip(LIMITES_MS, self.cubos):
+            acumulado += n
+            if acumulado >= objetivo:
+                return round(min(limite, self.maximo), 2)
+        return round(self.maximo, 2)
+
+    def media(self):
+        return self.suma / self.cuenta if self.cuenta else 0.0
+
+
+class MetricasStream:
+    """Contadores de un stream. Los escribe el hilo de video y la GUI al pintar.
+
+    `instantanea()` devuelve las tasas del intervalo desde la anterior y
+    reinicia los histogramas, así cada lectura refleja el estado actual.
+    """
+
+    def __init__(self, nombre):
+        self.nombre = nombre
+        self.bytes_red = 0
+        self.frames_parseados = 0
+        self.frames_decodificados = 0
+        self.frames_mostrados = 0
+        # Frames iguales al anterior que no se decodificaron, y el tiempo estimado que se ahorró
+        self.frames_repetidos = 0
+        self.ms_ahorrados = 0.0
+        self._coste_ms = 0.0
+        self.decodificacion = Histograma()
+        self.escalado = Histograma()
+        self.edad = Histograma()
+        self._anterior = (time.monotonic(), 0, 0, 0, 0, 0, 0.0)
+
+    def registrar_decodificacion(self, decodificacion_ms, escalado_ms):
+        self.frames_decodificados += 1
+        self.decodificacion.registrar(decodificacion_ms)
+        self.escalado.registrar(escalado_ms)
+        self._coste_ms = decodificacion_ms + escalado_ms
+
+    def registrar_repetido(self):
+        """Frame idéntico al anterior: se cuenta como ahorrado el coste del último decodificado"""
+        self.frames_repetidos += 1
+        self.ms_ahorrados += self._coste_ms
+
+    def registrar_mostrado(self, llegada):
+        self.frames_mostrados += 1
+        self.edad.registrar((time.monotonic() - llegada) * 1000.0)
+
+    def instantanea(self, descartados=0, reconexiones=0, tiempo_caido=0.0):
+        ahora = time.monotonic()
+        t0, bytes0, parseados0, decodificados0, mostrados0, repetidos0, ahorrados0 = self._anterior
+        intervalo = max(ahora - t0, 1e-6)
+        datos = {
+            "marca_tiempo": round(time.time(), 3),
+            "stream": self.nombre,
+            "bytes_red_s": round((self.bytes_red - bytes0) / intervalo),
+            "fps_parseados": round((self.frames_parseados - parseados0) / intervalo, 1),
+            "fps_decodificados": round((self.frames_decodificados - decodificados0) / intervalo, 1),
+            "fps_mostrados": round((self.frames_mostrados - mostrados0) / intervalo, 1),
+            "fps_repetidos": round((self.frames_repetidos - repetidos0) / intervalo, 1),
+            "ahorrado_ms_s": round((self.ms_ahorrados - ahorrados0) / intervalo, 1),
+            "descartados": descartados,
+            "reconexiones": reconexiones,
+            "tiempo_caido_s": round(tiempo_caido, 1),
+            "decodificacion_p50_ms": self.decodificacion.percentil(50),
+            "decodificacion_p95_ms": self.decodificacion.percentil(95),
+            "escalado_p50_ms": self.escalado.percentil(50),
+            "escalado_p95_ms": self.escalado.percentil(95),
+            "edad_p50_ms": self.edad.percentil(50),
+            "edad_p95_ms": self.edad.percentil(95),
+        }
+        self._anterior = (ahora, self.bytes_red, self.frames_parseados,
+                          self.frames_decodificados, self.frames_mostrados,
+                          self.frames_repetidos, self.ms_ahorrados)
+        self.decodificacion = Histograma()
+        self.escalado = Histograma()
+        self.edad = Histograma()
+        return datos
+
+
+def texto_metricas(datos):
+    """Resumen de una instantánea para el overlay en pantalla"""
+    return (
+        f"{datos['stream']}\n"
+        f"red {datos['bytes_red_s'] / 1024:.0f} KB/s · "
+        f"parse {datos['fps_parseados']} · dec {datos['fps_decodificados']} · "
+        f"vis {datos['fps_mostrados']} fps · desc {datos['descartados']}\n"
+        f"repetidos {datos['fps_repetidos']} fps · ahorro {datos['ahorrado_ms_s']:g} ms/s · "
+        f"reconex {datos['reconexiones']} ({datos['tiempo_caido_s']:g} s caído)\n"
+        f"dec p50/p95 {datos['decodificacion_p50_ms']:g}/{datos['decodificacion_p95_ms']:g} ms · "
+        f"esc {datos['escalado_p50_ms']:g}/{datos['escalado_p95_ms']:g} ms · "
+        f"edad {datos['edad_p50_ms']:g}/{datos['edad_p95_ms']:g} ms"
+    )
+
+
+class MedidorArranque:
+    """Tiempos de arranque medidos desde `inicio` (perf_counter al cargar main.py)"""
+
+    def __init__(self, inicio):
+        self.inicio = inicio
+        self.marcas = {}
+
+    def marcar(self, nombre):
+        """Registra e imprime solo la primera vez que ocurre cada hito"""
+        if nombre in self.marcas:
+            return
+        ms = (time.perf_counter() - self.inicio) * 1000.0
+        self.marcas[nombre] = ms
+        print(f"⏱️ Arranque - {nombre}: {ms:.0f} ms")
+
+
+class VolcadoMetricas:
+    """Añade instantáneas a un fichero JSON Lines (.json/.jsonl) o CSV (.csv)"""
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self.es_csv = ruta.lower().endswith(".csv")
+
+    def escribir(self, instantaneas):
+        if not instantaneas:
+            return
+        nuevo = not os.path.exists(self.ruta)
+        with open(self.ruta, "a", newline="", encoding="utf-8") as f:
+            if self.es_csv:
+                writer = csv.DictWriter(f, fieldnames=CAMPOS)
+                if nuevo:
+                    writer.writeheader()
+                writer.writerows(instantaneas)
+            else:
+                for datos in instantaneas:
+                    f.write(json.dumps(datos) + "\n")
@@ -0,0 +1,191 @@
+# MotorDecodificacion.py
+import multiprocessing
+import os
+import threading
+import time
+from collections import OrderedDict
+from multiprocessing import shared_memory
+import cv2
+import numpy as np
+from Decodificador import Decodificador
+from DetectorMovimiento import dibujar_cajas
+from Entorno import numero_en_rango, valor_entorno
+
+SLOTS = 8
+TAMANO_SLOT = 1920 * 1080 * 3  # bytes: un frame RGB ya escalado de hasta 1080p
+ESPERA_CIERRE = 2.0  # segundos que cerrar() espera a los trabajos en curso
+MAXIMO_DECODIFICADORES = 8  # tamaños destino recordados por trabajador (mosaico, vista individual...)
+
+# Estado de cada proceso trabajador
+_memoria = None
+_decodificadores = OrderedDict()
+
+
+def _iniciar_trabajador(nombre):
+    global _memoria
+    _memoria = shared_memory.SharedMemory(name=nombre)
+
+
+def _decodificar_en_slot(jpg, slot, tamano_slot, tamano_destino, cajas):
+    """Se ejecuta en el trabajador: decodifica, escala y escribe el RGB directamente en el slot.
+
+    Devuelve (forma, ms de decodificación, ms de escalado), o None si el
+    JPEG no se pudo decodificar o el frame no cabe en el slot.
+    """
+    # Los tamaños usados hace poco, con límite: al redimensionar cada paso trae uno nuevo
+    decodificador = _decodificadores.pop(tamano_destino, None) or Decodificador(*tamano_destino)
+    _decodificadores[tamano_destino] = decodificador
+    while len(_decodificadores) > MAXIMO_DECODIFICADORES:
+        _decodificadores.popitem(last=False)
+    t0 = time.perf_counter()
+    frame = decodificador.decodificar(jpg)
+    if frame is None:
+        return None
+    t1 = time.perf_counter()
+    if cajas:
+        dibujar_cajas(frame, cajas)
+    escalado = decodificador.escalar(frame)
+    if escalado.nbytes > tamano_slot:
+        return None
+    destino = np.ndarray(escalado.shape, dtype=np.uint8, buffer=_memoria.buf, offset=slot * tamano_slot)
+    cv2.cvtColor(escalado, cv2.COLOR_BGR2RGB, dst=destino)
+    t2 = time.perf_counter()
+    return escalado.shape, (t1 - t0) * 1000.0, (t2 - t1) * 1000.0
+
+
+class SlotFrame:
+    """Frame decodificado que vive en un slot de la memoria compartida del motor.
+
+    `imagen` es una vista sin copia; hay que llamar a `liberar()` cuando ya
+    no se necesite (tras pintarlo o al descartarlo) para devolver el slot.
+    """
+    __slots__ = ("motor", "indice", "forma")
+
+    def __init__(self, motor, indice, forma):
+        self.motor = motor
+        self.indice = indice
+        self.forma = forma
+
+    @property
+    def imagen(self):
+        return np.ndarray(self.forma, dtype=np.uint8, buffer=self.motor.memoria.buf,
+                          offset=self.indice * self.motor.tamano_slot)
+
+    def liberar(self):
+        if self.indice is not None:
+            self.motor.liberar(self.indice)
+            self.indice = None
+
+
+class MotorDecodificacion:
+    """Reparte la decodificación de JPEG entre varios procesos.
+
+    Los trabajadores escriben el frame ya escalado y en RGB en slots
+    preasignados de un bloque de `multiprocessing.shared_memory`; al proceso
+    principal solo vuelve la forma del frame, nunca los píxeles. Sin slots
+    libres `decodificar()` devuelve False y quien llama decodifica por su
+    cuenta, así un pico de carga nunca bloquea el stream.
+    """
+
+    def __init__(self, procesos=None, slots=SLOTS, tamano_slot=TAMANO_SLOT):
+        self.procesos = procesos or os.cpu_count() or 1
+        self.tamano_slot = tamano_slot
+        self.memoria = shared_memory.SharedMemory(create=True, size=slots * tamano_slot)
+        self._libres = list(range(slots))
+        self._lock = threading.Lock()
+        self._sin_trabajos = threading.Condition(self._lock)
+        self._en_curso = 0
+        self._cerrado = False
+        self.sin_slot = 0
+        # spawn: hacer fork de un proceso con hilos de Qt y de video no es seguro
+        contexto = multiprocessing.get_context("spawn")
+        try:
+            self._pool = contexto.Pool(self.procesos, initializer=_iniciar_trabajador,
+                                       initargs=(self.memoria.name,))
+        except BaseException:
+            # Sin pool el motor no existe: el segmento no debe sobrevivir al proceso
+            self.memoria.close()
+            self.memoria.unlink()
+            raise
+        print(f"🧮 Motor de decodificación: {self.procesos} procesos, {slots} slots de "
+              f"{tamano_slot / 1e6:.1f} MB en memoria compartida")
+
+    @classmethod
+    def desde_entorno(cls):
+        """Motor según DETECTORCAM_PROCESOS_DECODIFICACION (0, sin definir o no válido: desactivado).
+
+        Se llama desde un slot de la GUI: si el motor no se puede crear se
+        avisa y cada hilo decodifica por su cuenta.
+        """
+        procesos = valor_entorno("DETECTORCAM_PROCESOS_DECODIFICACION", 0, numero_en_rango(0, entero=True))
+        if procesos <= 0:
+            return None
+        slots = valor_entorno("DETECTORCAM_DECODIFICACION_SLOTS", SLOTS, numero_en_rango(1, entero=True))
+        try:
+            return cls(procesos, slots)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ No se pudo crear el motor de decodificación ({e}): se decodifica en cada hilo")
+            return None
+
+    def decodificar(self, jpg, tamano_destino, cajas, al_terminar):
+        """Encarga la decodificación. `al_terminar(slot_frame, ms_decodificacion, ms_escalado)`
+        se llama desde un hilo del pool; slot_frame es None si falló. False si no hay slot libre.
+        """
+        with self._lock:
+            if self._cerrado:
+                return False
+            if not self._libres:
+                self.sin_slot += 1
+                return False
+            indice = self._libres.pop()
+            self._en_curso += 1
+
+        def terminado(resultado):
+            if not self._terminar_trabajo():
+                return
+            if resultado is None:
+                self.liberar(indice)
+                al_terminar(None, 0.0, 0.0)
+            else:
+                forma, decodificacion_ms, escalado_ms = resultado
+                al_terminar(SlotFrame(self, indice, forma), decodificacion_ms, escalado_ms)
+
+        def fallo(error):
+            if not self._terminar_trabajo():
+                return
+            print(f"⚠️ Error en el motor de decodificación: {error}")
+            self.liberar(indice)
+            al_terminar(None, 0.0, 0.0)
+
+        self._pool.apply_async(_decodificar_en_slot,
+                               (bytes(jpg), indice, self.tamano_slot, tuple(tamano_destino), list(cajas)),
+                               callback=terminado, error_callback=fallo)
+        return True
+
+    def _terminar_trabajo(self):
+        """Cuenta un trabajo como acabado. False si el motor ya se cerró y hay que ignorar el resultado"""
+        with self._lock:
+            self._en_curso -= 1
+            self._sin_trabajos.notify_all()
+            return not self._cerrado
+
+    def liberar(self, indice):
+        with self._lock:
+            self._libres.append(indice)
+
+    def cerrar(self):
+        """Espera un poco a los trabajos en curso y para los procesos.
+
+        Los resultados que lleguen después se ignoran: su slot ya no existe.
+        """
+        with self._lock:
+            self._cerrado = True
+            self._sin_trabajos.wait_for(lambda: self._en_curso == 0, ESPERA_CIERRE)
+        self._pool.terminate()
+        self._pool.join()
+        try:
+            self.memoria.close()
+        except BufferError:
+            # Aún hay una vista de un frame en uso: se libera con el proceso
+            pass
+        self.memoria.unlink()
@@ -0,0 +1,239 @@
+# ParserMJPEG.py
+from email.message import Message
+
+SOI = b'\xff\xd8'
+EOI = b'\xff\xd9'
+FIN_CABECERAS = b'\r\n\r\n'
+
+TAMANO_LECTURA = 64 * 1024
+CAPACIDAD_INICIAL = 1024 * 1024
+CAPACIDAD_MAXIMA = 32 * 1024 * 1024
+
+
+def boundary_de_respuesta(respuesta):
+    """Devuelve el boundary del Content-Type multipart de la respuesta, o None"""
+    try:
+        return boundary_de_tipo(respuesta.headers.get("Content-Type"))
+    except AttributeError:
+        return None
+
+
+def boundary_de_tipo(tipo):
+    """Boundary de una cabecera Content-Type multipart, o None"""
+    if not tipo:
+        return None
+    cabecera = Message()
+    cabecera["Content-Type"] = tipo
+    boundary = cabecera.get_param("boundary")
+    if not boundary:
+        return None
+    boundary = boundary.strip('"')
+    if boundary.startswith("--"):
+        boundary = boundary[2:]
+    return boundary.encode("latin-1")
+
+
+def leer_bloque(stream, tamano=TAMANO_LECTURA):
+    """Lee lo que haya disponible (hasta `tamano`) sin esperar a llenar el bloque"""
+    read1 = getattr(stream, "read1", None)
+    if read1 is not None:
+        return read1(tamano)
+    return stream.read(tamano)
+
+
+class ParserMJPEG:
+    """Parser incremental de streams MJPEG (multipart/x-mixed-replace).
+
+    Los datos se acumulan en un bytearray preasignado. Si el servidor envía
+    boundary y Content-Length el payload se extrae por longitud, sin buscar
+    marcadores; si no, se buscan SOI/EOI retomando la búsqueda donde se quedó.
+
+    `frames()` devuelve memoryviews sobre el buffer interno: son válidas solo
+    hasta la siguiente llamada a `alimentar()`.
+    """
+
+    def __init__(self, boundary=None, capacidad=CAPACIDAD_INICIAL):
+        self.separador = b"--" + boundary if boundary else None
+        self._buffer = bytearray(capacidad)
+        self._vista = memoryview(self._buffer)
+        self._inicio = 0
+        self._fin = 0
+        self._busqueda = 0
+        self._soi = -1
+        self._longitud = None
+        self.frames_extraidos = 0
+        self.bytes_descartados = 0
+
+    def alimentar(self, datos):
+        n = len(datos)
+        if self._fin + n > len(self._buffer):
+            self._hacer_sitio(n)
+        self._vista[self._fin:self._fin + n] = datos
+        self._fin += n
+        return n
+
+    def frames(self):
+        while True:
+            frame = self._siguiente()
+            if frame is None:
+                return
+            self.frames_extraidos += 1
+            yield frame
+
+    def _siguiente(self):
+        if self.separador is not None and self._longitud is None and self._soi == -1:
+            if not self._leer_cabeceras():
+                return None
+
+        if self._longitud is not None:
+            if self._fin - self._inicio < self._longitud:
+                return None
+            inicio = self._inicio
+            fin = inicio + self._longitud
+            self._longitud = None
+            self._inicio = self._busqueda = fin
+            if self._vista[inicio:inicio + 2] == SOI:
+                return self._vista[inicio:fin]
+            # Content-Length no apunta a un JPEG: resincronizar por marcadores
+            self._inicio = self._busqueda = inicio
+            self._soi = -2
+            return self._buscar_marcadores()
+
+        return self._buscar_marcadores()
+
+    def _leer_cabeceras(self):
+        """Consume las cabeceras de la siguiente parte. False si aún no están completas"""
+        inicio_parte = self._buffer.find(self.separador, self._busqueda, self._fin)
+        if inicio_parte == -1:
+            if self._fin - self._inicio > CAPACIDAD_INICIAL:
+                # El servidor anuncia boundary pero no lo usa: pasar a marcadores
+                self.separador = None
+                self._soi = -2
+                return True
+            self._busqueda = max(self._inicio, self._fin - len(self.separador) + 1)
+            return False
+        fin_cabeceras = self._buffer.find(FIN_CABECERAS, inicio_parte, self._fin)
+        if fin_cabeceras == -1:
+            self._busqueda = inicio_parte
+            return False
+
+        cabeceras = self._vista[inicio_parte:fin_cabeceras].tobytes()
+        self._inicio = self._busqueda = fin_cabeceras + len(FIN_CABECERAS)
+
+        for linea in cabeceras.split(b"\r\n")[1:]:
+            nombre, _, valor = linea.partition(b":")
+            if nombre.strip().lower() == b"content-length":
+                try:
+                    self._longitud = int(valor.strip())
+                except ValueError:
+                    self._longitud = None
+                break
+        if self._longitud is None:
+            # Parte sin Content-Length: el payload se delimita por marcadores
+            self._soi = -2
+        return True
+
+    def _buscar_marcadores(self):
+        if self._soi < 0:
+            soi = self._buffer.find(SOI, self._busqueda, self._fin)
+            if soi == -1:
+                # Conservar un byte por si el marcador quedó partido entre lecturas
+                self._busqueda = max(self._inicio, self._fin - 1)
+                return None
+            self._soi = soi
+            self._busqueda = soi + 2
+
+        eoi = self._buffer.find(EOI, self._busqueda, self._fin)
+        if eoi == -1:
+            self._busqueda = max(self._soi + 2, self._fin - 1)
+            return None
+
+        inicio, fin = self._soi, eoi + 2
+        self.bytes_descartados += inicio - self._inicio
+        self._inicio = self._busqueda = fin
+        self._soi = -1
+        return self._vista[inicio:fin]
+
+    def _hacer_sitio(self, n):
+        pendiente = self._fin - self._inicio
+        capacidad = len(self._buffer)
+        while pendiente + n > capacidad:
+            capacidad *= 2
+        if capacidad > CAPACIDAD_MAXIMA:
+            # Un frame que no cabe ni en el máximo: se descarta lo acumulado
+            self.bytes_descartados += pendiente
+            self._reiniciar_posiciones(0)
+            capacidad = max(len(self._buffer), n)
+            pendiente = 0
+
+        desplazamiento = self._inicio
+        if capacidad != len(self._buffer):
+            nuevo = bytearray(capacidad)
+            nuevo[:pendiente] = self._vista[self._inicio:self._fin]
+            self._buffer = nuevo
+            self._vista = memoryview(nuevo)
+        elif pendiente:
+            self._vista[:pendiente] = self._vista[self._inicio:self._fin]
+
+        self._inicio = 0
+        self._fin = pendiente
+        self._busqueda = max(0, self._busqueda - desplazamiento)
+        if self._soi >= 0:
+            self._soi -= desplazamiento
+
+    def _reiniciar_posiciones(self, fin):
+        self._inicio = self._busqueda = 0
+        self._fin = fin
+        self._soi = -1
+        self._longitud = None
+
+
+class DecodificadorChunked:
+    """Quita el Transfer-Encoding chunked de HTTP/1.1 de forma incremental.
+
+    `alimentar()` devuelve los trozos de payload contenidos en los datos
+    recibidos, como memoryviews sobre ellos (sin copiar). `terminado` pasa a
+    True al llegar el chunk de tamaño 0.
+    """
+
+    def __init__(self):
+        self._linea = bytearray()
+        self._restante = 0  # bytes de datos que quedan del chunk actual
+        self._crlf = 0  # bytes del CRLF tras los datos que faltan por saltar
+        self.terminado = False
+
+    def alimentar(self, datos):
+        datos = memoryview(datos)
+        trozos = []
+        pos = 0
+        n = len(datos)
+        while pos < n and not self.terminado:
+            if self._restante:
+                fin = min(n, pos + self._restante)
+                trozos.append(datos[pos:fin])
+                self._restante -= fin - pos
+                pos = fin
+                if not self._restante:
+                    self._crlf = 2
+            elif self._crlf:
+                salto = min(self._crlf, n - pos)
+                self._crlf -= salto
+                pos += salto
+            else:
+                fin = bytes(datos[pos:min(n, pos + 64)]).find(b"\n")
+                if fin == -1:
+                    self._linea += datos[pos:min(n, pos + 64)]
+                    pos = min(n, pos + 64)
+                    if len(self._linea) > 1024:
+                        raise ValueError("Línea de tamaño de chunk demasiado larga")
+                    continue
+                self._linea += datos[pos:pos + fin]
+                pos += fin + 1
+                tamano = self._linea.split(b";")[0].strip()
+                self._linea.clear()
+                if not tamano:
+                    continue
+                self._restante = int(tamano, 16)
+                if not self._restante:
+                    self.terminado = True
+        return trozos
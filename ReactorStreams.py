@@ -0,0 +1,456 @@
+# ReactorStreams.py
+import errno
+import os
+import queue
+import selectors
+import socket
+import ssl
+import threading
+import time
+from collections import deque
+from urllib.parse import urlsplit
+from ClienteHTTP import TIMEOUT_CONEXION
+from Entorno import booleano, valor_entorno
+from ParserMJPEG import DecodificadorChunked, ParserMJPEG, TAMANO_LECTURA, boundary_de_tipo
+from VideoThread import VideoThread
+
+HILOS_DECODIFICACION = max(1, min(4, os.cpu_count() or 1))
+TIMEOUT_LECTURA_STREAM = 10.0  # segundos sin datos antes de dar el stream por caído
+MAXIMO_CABECERAS = 64 * 1024
+LECTURAS_POR_EVENTO = 4  # reparto justo: ningún stream acapara el bucle
+INTERVALO_REVISION = 0.25  # segundos entre revisiones de timeouts y reconexiones
+TTL_DIRECCIONES = 300.0  # segundos que se reutiliza la dirección resuelta de un host
+
+
+class ErrorHTTP(Exception):
+    pass
+
+
+class EtapaDecodificacion:
+    """Hilos fijos que decodifican lo que encarga el reactor.
+
+    Cada stream tiene como mucho un frame para mostrar y otro para la
+    detección de movimiento en la cola o en decodificación, así que el
+    trabajo pendiente está acotado por el número de cámaras y los hilos no
+    crecen con ellas. cv2.imdecode suelta el GIL: varios hilos sí aprovechan
+    varios núcleos.
+    """
+
+    def __init__(self, hilos=HILOS_DECODIFICACION):
+        self._cola = queue.Queue()
+        self._hilos = [threading.Thread(target=self._trabajar, name=f"decodificacion-{i}", daemon=True)
+                       for i in range(hilos)]
+        for hilo in self._hilos:
+            hilo.start()
+
+    def encargar(self, stream, funcion, *args):
+        """Ejecuta `funcion(*args)` en un hilo de la etapa; `stream` solo identifica el encargo en los errores"""
+        self._cola.put((stream, funcion, args))
+
+    def _trabajar(self):
+        while True:
+            tarea = self._cola.get()
+            if tarea is None:
+                return
+            stream, funcion, args = tarea
+            try:
+                funcion(*args)
+            except Exception as e:
+                print(f"⚠️ Error decodificando {stream.url}: {e}")
+
+    def cerrar(self):
+        for _ in self._hilos:
+            self._cola.put(None)
+        for hilo in self._hilos:
+            hilo.join(2)
+
+
+class StreamReactor(VideoThread):
+    """Stream servido por un ReactorStreams con la interfaz de VideoThread.
+
+    No arranca ningún hilo: `start()` lo registra en el reactor, que le pasa
+    los frames parseados. Tanto el JPEG pendiente como el análisis de
+    movimiento se encargan a la etapa de decodificación compartida: en el
+    hilo de I/O no se decodifica nada.
+    """
+
+    def __init__(self, reactor, url, **kwargs):
+        super().__init__(url, **kwargs)
+        self.reactor = reactor
+        self._en_cola = False
+        self._analizando = False
+
+    def start(self):
+        self.running = True
+        self.reactor.agregar(self)
+
+    def stop(self):
+        self.running = False
+        self.reactor.quitar(self)
+        self.vaciar_buzon()
+
+    def isRunning(self):
+        return self.running
+
+    def _decodificando(self):
+        return self._en_cola or self._en_vuelo
+
+    def _avisar(self):
+        # Sin hilo decodificador propio: encargar a la etapa solo encola, así
+        # que se hace aquí mismo, sea el reactor, la GUI o la etapa quien avisa
+        with self._lock:
+            if not self.running or not self._puede_publicar():
+                return
+            jpg, llegada = self._tomar_pendiente()
+            self._ultima_publicacion = time.monotonic()
+            self._en_cola = True
+        self.reactor.etapa.encargar(self, self.decodificar_encargo, jpg, llegada)
+
+    def decodificar_encargo(self, jpg, llegada):
+        try:
+            if self.running and self.activo:
+                self.publicar(jpg, llegada)
+        finally:
+            self._en_cola = False
+            self._avisar()
+
+    def _detectar_movimiento(self, jpg):
+        # Aquí solo se decide si toca: el análisis decodifica el JPEG
+        detector = self.detector
+        if detector is None or self._analizando or not detector.toca_analizar():
+            return
+        self._analizando = True
+        self.reactor.etapa.encargar(self, self._analizar_movimiento, bytes(jpg))
+
+    def _analizar_movimiento(self, jpg):
+        try:
+            if self.running:
+                super()._detectar_movimiento(jpg)
+        finally:
+            self._analizando = False
+
+
+class _Conexion:
+    """Estado de la conexión HTTP de un stream dentro del reactor"""
+
+    def __init__(self, stream):
+        self.stream = stream
+        partes = urlsplit(stream.url)
+        self.tls = partes.scheme == "https"
+        self.host = partes.hostname
+        self.puerto = partes.port or (443 if self.tls else 80)
+        ruta = partes.path or "/"
+        if partes.query:
+            ruta += "?" + partes.query
+        anfitrion = partes.netloc.rsplit("@", 1)[-1]
+        self.peticion = (f"GET {ruta} HTTP/1.1\r\nHost: {anfitrion}\r\nUser-Agent: DetectorCam\r\n"
+                         f"Accept: */*\r\nConnection: close\r\n\r\n").encode("latin-1")
+        self.buffer = bytearray(TAMANO_LECTURA)
+        self.vista = memoryview(self.buffer)
+        self.sock = None
+        self.reiniciar()
+        self.reintento_en = 0.0
+
+    def reiniciar(self):
+        self.estado = None
+        self.salida = b""
+        self.cabeceras = bytearray()
+        self.parser = None
+        self.chunked = None
+        self.limite = 0.0
+        self.reintento_en = None
+
+
+class ReactorStreams:
+    """Un único hilo que lee todos los streams MJPEG con `selectors`.
+
+    Implementa lo justo de HTTP/1.1 sobre sockets no bloqueantes (conexión,
+    TLS, petición, cabeceras y cuerpo con o sin chunked), hace el framing
+    MJPEG con un ParserMJPEG por stream y pasa el último JPEG completo de
+    cada stream a una EtapaDecodificacion acotada. Con 32 cámaras sigue
+    habiendo un hilo de I/O más los de decodificación.
+    """
+
+    def __init__(self, hilos_decodificacion=HILOS_DECODIFICACION):
+        self.etapa = EtapaDecodificacion(hilos_decodificacion)
+        self._selector = selectors.DefaultSelector()
+        self._contexto_tls = None
+        self._direcciones = {}  # (host, puerto) -> (addrinfo, instante en que caduca)
+        self._resoluciones = {}  # (host, puerto) -> conexiones que esperan la resolución en curso
+        self._conexiones = {}
+        self._ordenes = deque()
+        self._despertador, self._timbre = socket.socketpair()
+        self._despertador.setblocking(False)
+        self._timbre.setblocking(False)
+        self._selector.register(self._despertador, selectors.EVENT_READ, None)
+        self._running = True
+        self._hilo = threading.Thread(target=self._bucle, name="reactor-streams", daemon=True)
+        self._hilo.start()
+
+    @classmethod
+    def desde_entorno(cls):
+        """Reactor si DETECTORCAM_REACTOR=1 (o true/yes/on); si no, cada stream usa su propio VideoThread"""
+        if not valor_entorno("DETECTORCAM_REACTOR", False, booleano):
+            return None
+        return cls()
+
+    # --- Órdenes desde otros hilos ---
+
+    def agregar(self, stream):
+        self._ordenar("agregar", stream)
+
+    def quitar(self, stream):
+        self._ordenar("quitar", stream)
+
+    def _ordenar(self, orden, dato):
+        self._ordenes.append((orden, dato))
+        try:
+            self._timbre.send(b"\0")
+        except (BlockingIOError, OSError):
+            pass
+
+    def cerrar(self):
+        self._running = False
+        self._ordenar("cerrar", None)
+        self._hilo.join(3)
+        self.etapa.cerrar()
+
+    # --- Bucle de I/O ---
+
+    def _bucle(self):
+        proxima_revision = 0.0
+        while self._running:
+            for clave, mascara in self._selector.select(INTERVALO_REVISION):
+                if clave.data is None:
+                    self._atender_ordenes()
+                elif clave.fileobj is clave.data.sock:
+                    # Si no, el socket se cerró en esta misma vuelta
+                    self._evento(clave.data)
+            ahora = time.monotonic()
+            if ahora >= proxima_revision:
+                self._revisar(ahora)
+                proxima_revision = ahora + INTERVALO_REVISION
+        for conexion in list(self._conexiones.values()):
+            self._cerrar_socket(conexion)
+        self._selector.close()
+        self._despertador.close()
+        self._timbre.close()
+
+    def _atender_ordenes(self):
+        try:
+            while self._despertador.recv(4096):
+                pass
+        except (BlockingIOError, OSError):
+            pass
+        while self._ordenes:
+            orden, dato = self._ordenes.popleft()
+            if orden == "agregar" and dato not in self._conexiones:
+                conexion = _Conexion(dato)
+                self._conexiones[dato] = conexion
+                self._conectar(conexion)
+            elif orden == "quitar" and dato in self._conexiones:
+                self._cerrar_socket(self._conexiones.pop(dato))
+            elif orden == "resuelto":
+                self._resuelto(*dato)
+
+    def _revisar(self, ahora):
+        for stream, conexion in list(self._conexiones.items()):
+            if stream._inactividad_agotada():
+                print(f"💤 Cerrando conexión en reserva sin uso: {stream.url}")
+                self._cerrar_socket(self._conexiones.pop(stream))
+                stream.running = False
+            elif conexion.reintento_en is not None and ahora >= conexion.reintento_en:
+                self._conectar(conexion)
+            elif conexion.sock is not None and ahora > conexion.limite:
+                self._desconectar(conexion, "Error en stream: tiempo de espera agotado")
+
+    def _resolver(self, clave):
+        """Hilo auxiliar: getaddrinfo bloquea y no puede hacerse en el bucle de I/O"""
+        try:
+            resultado = socket.getaddrinfo(*clave, type=socket.SOCK_STREAM)[0]
+        except OSError as e:
+            resultado = e
+        self._ordenar("resuelto", (clave, resultado))
+
+    def _resuelto(self, clave, resultado):
+        if not isinstance(resultado, OSError):
+            self._direcciones[clave] = (resultado, time.monotonic() + TTL_DIRECCIONES)
+        for conexion in self._resoluciones.pop(clave, ()):
+            # Solo si el stream sigue en el reactor esperando esta resolución
+            if self._conexiones.get(conexion.stream) is not conexion or conexion.estado != "resolviendo":
+                continue
+            if isinstance(resultado, OSError):
+                self._desconectar(conexion, f"Error en stream: {resultado}")
+            else:
+                self._conectar(conexion)
+
+    def _direccion(self, conexion):
+        """addrinfo en caché del host de la conexión, o None tras lanzar su resolución.
+
+        Todas las cámaras suelen estar en el mismo servidor: se resuelve una
+        vez y se reutiliza aunque fallen conexiones sueltas, hasta que caduca.
+        """
+        clave = (conexion.host, conexion.puerto)
+        direccion = self._direcciones.get(clave)
+        if direccion is not None and time.monotonic() < direccion[1]:
+            return direccion[0]
+        conexion.estado = "resolviendo"
+        if clave not in self._resoluciones:
+            self._resoluciones[clave] = []
+            threading.Thread(target=self._resolver, args=(clave,), name="reactor-dns", daemon=True).start()
+        self._resoluciones[clave].append(conexion)
+        return None
+
+    def _conectar(self, conexion):
+        conexion.reiniciar()
+        direccion = self._direccion(conexion)
+        if direccion is None:
+            return
+        try:
+            familia, tipo, proto, _, direccion = direccion
+            sock = socket.socket(familia, tipo, proto)
+            sock.setblocking(False)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            error = sock.connect_ex(direccion)
+            if error not in (0, errno.EINPROGRESS, errno.EWOULDBLOCK):
+                sock.close()
+                raise OSError(error, os.strerror(error))
+        except OSError as e:
+            self._desconectar(conexion, f"Error en stream: {e}")
+            return
+        conexion.sock = sock
+        conexion.estado = "conectando"
+        conexion.limite = time.monotonic() + TIMEOUT_CONEXION
+        self._selector.register(sock, selectors.EVENT_WRITE, conexion)
+
+    def _esperar(self, conexion, eventos):
+        self._selector.modify(conexion.sock, eventos, conexion)
+
+    def _evento(self, conexion):
+        try:
+            if conexion.estado == "conectando":
+                error = conexion.sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+                if error:
+                    raise OSError(error, os.strerror(error))
+                if conexion.tls:
+                    self._selector.unregister(conexion.sock)
+                    if self._contexto_tls is None:
+                        self._contexto_tls = ssl.create_default_context()
+                    conexion.sock = self._contexto_tls.wrap_socket(
+                        conexion.sock, server_hostname=conexion.host, do_handshake_on_connect=False)
+                    self._selector.register(conexion.sock, selectors.EVENT_WRITE, conexion)
+                    conexion.estado = "tls"
+                else:
+                    conexion.estado = "enviando"
+                    conexion.salida = conexion.peticion
+            if conexion.estado == "tls":
+                try:
+                    conexion.sock.do_handshake()
+                except ssl.SSLWantReadError:
+                    self._esperar(conexion, selectors.EVENT_READ)
+                    return
+                except ssl.SSLWantWriteError:
+                    self._esperar(conexion, selectors.EVENT_WRITE)
+                    return
+                conexion.estado = "enviando"
+                conexion.salida = conexion.peticion
+            if conexion.estado == "enviando":
+                try:
+                    enviados = conexion.sock.send(conexion.salida)
+                except (BlockingIOError, ssl.SSLWantWriteError, ssl.SSLWantReadError):
+                    self._esperar(conexion, selectors.EVENT_WRITE)
+                    return
+                conexion.salida = conexion.salida[enviados:]
+                if conexion.salida:
+                    self._esperar(conexion, selectors.EVENT_WRITE)
+                    return
+                conexion.estado = "cabeceras"
+                conexion.limite = time.monotonic() + TIMEOUT_LECTURA_STREAM
+                self._esperar(conexion, selectors.EVENT_READ)
+                return
+            self._leer(conexion)
+        except (OSError, ValueError, ErrorHTTP) as e:
+            self._desconectar(conexion, f"Error en stream: {e}")
+
+    def _leer(self, conexion):
+        for _ in range(LECTURAS_POR_EVENTO):
+            try:
+                n = conexion.sock.recv_into(conexion.buffer)
+            except (BlockingIOError, ssl.SSLWantReadError, ssl.SSLWantWriteError):
+                return
+            if not n:
+                self._desconectar(conexion, None)
+                return
+            conexion.limite = time.monotonic() + TIMEOUT_LECTURA_STREAM
+            datos = conexion.vista[:n]
+            if conexion.estado == "cabeceras":
+                self._leer_cabeceras(conexion, datos)
+            else:
+                self._leer_cuerpo(conexion, datos)
+            if conexion.sock is None:
+                return
+
+    def _leer_cabeceras(self, conexion, datos):
+        # Solo se busca el final en lo nuevo (y los 3 bytes previos, por si el CRLFCRLF llega partido)
+        desde = max(0, len(conexion.cabeceras) - 3)
+        conexion.cabeceras += datos
+        fin = conexion.cabeceras.find(b"\r\n\r\n", desde)
+        if fin == -1 and len(conexion.cabeceras) <= MAXIMO_CABECERAS:
+            return
+        if fin == -1 or fin > MAXIMO_CABECERAS:
+            # También si el final llegó en la misma lectura que el exceso
+            raise ErrorHTTP("cabeceras HTTP demasiado largas")
+        lineas = bytes(conexion.cabeceras[:fin]).decode("latin-1").split("\r\n")
+        partes = lineas[0].split(" ", 2)
+        if len(partes) < 2 or not partes[1].isdigit():
+            raise ErrorHTTP(f"respuesta HTTP inválida: {lineas[0]!r}")
+        if partes[1] != "200":
+            raise ErrorHTTP(f"HTTP {lineas[0].split(' ', 1)[-1]}")
+        cabeceras = {}
+        for linea in lineas[1:]:
+            nombre, _, valor = linea.partition(":")
+            cabeceras[nombre.strip().lower()] = valor.strip()
+
+        conexion.parser = ParserMJPEG(boundary_de_tipo(cabeceras.get("content-type")))
+        if "chunked" in cabeceras.get("transfer-encoding", "").lower():
+            conexion.chunked = DecodificadorChunked()
+        conexion.estado = "cuerpo"
+        resto = bytes(conexion.cabeceras[fin + 4:])
+        conexion.cabeceras = bytearray()
+        if resto:
+            self._leer_cuerpo(conexion, memoryview(resto))
+
+    def _leer_cuerpo(self, conexion, datos):
+        stream = conexion.stream
+        stream.metricas.bytes_red += len(datos)
+        trozos = conexion.chunked.alimentar(datos) if conexion.chunked else (datos,)
+        for trozo in trozos:
+            conexion.parser.alimentar(trozo)
+            stream._procesar_frames(conexion.parser.frames())
+        if conexion.chunked and conexion.chunked.terminado:
+            self._desconectar(conexion, None)
+
+    def _cerrar_socket(self, conexion):
+        if conexion.sock is None:
+            return
+        try:
+            self._selector.unregister(conexion.sock)
+        except (KeyError, ValueError):
+            pass
+        try:
+            conexion.sock.close()
+        except OSError:
+            pass
+        conexion.sock = None
+
+    def _desconectar(self, conexion, error_msg):
+        """Como el final de VideoThread._leer_stream: reintento programado o fin del stream"""
+        self._cerrar_socket(conexion)
+        conexion.reiniciar()
+        stream = conexion.stream
+        espera = stream._tras_desconexion(error_msg) if stream.running else None
+        if espera is None:
+            self._conexiones.pop(stream, None)
+            stream.running = False
+        else:
+            conexion.reintento_en = time.monotonic() + espera
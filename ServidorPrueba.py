@@ -0,0 +1,187 @@
+# ServidorPrueba.py
+import json
+import random
+import re
+import struct
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import cv2
+import numpy as np
+
+BOUNDARY = b"frame"
+COM = b"\xff\xfe"
+
+
+def marca_envio(jpg):
+    """Instante (time.time) en que ServidorPrueba envió el JPEG, leído de su segmento COM"""
+    if bytes(jpg[2:4]) != COM or len(jpg) < 14:
+        return None
+    return struct.unpack(">d", bytes(jpg[6:14]))[0]
+
+
+def generar_frames(ancho, alto, cantidad=30, calidad=80):
+    """JPEGs sintéticos con un patrón que cambia en cada frame"""
+    frames = []
+    x = np.linspace(0, 255, ancho, dtype=np.float32)
+    y = np.linspace(0, 255, alto, dtype=np.float32)[:, None]
+    for i in range(cantidad):
+        img = np.empty((alto, ancho, 3), dtype=np.uint8)
+        img[..., 0] = (x + i * 8) % 256
+        img[..., 1] = (y + i * 4) % 256
+        img[..., 2] = ((x + y) / 2 + i * 16) % 256
+        cv2.putText(img, str(i), (ancho // 10, alto // 2), cv2.FONT_HERSHEY_SIMPLEX,
+                    alto / 150, (255, 255, 255), max(1, alto // 100))
+        ok, jpg = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, calidad])
+        frames.append(jpg.tobytes())
+    return frames
+
+
+class ServidorPrueba:
+    """Servidor local que imita al servidor de cámaras para pruebas y benchmarks.
+
+    Implementa /activar-camara, /listar-camaras, /desactivar-camara y
+    /video/{i} sirviendo MJPEG sintético. Con `rafaga` > 1 los frames salen
+    de `rafaga` en `rafaga` seguidos, con la misma cadencia media. Cada JPEG lleva un segmento COM
+    con el instante de envío para poder medir la latencia de extremo a
+    extremo (ver `marca_envio`).
+    """
+
+    def __init__(self, puerto=0, camaras=2, ancho=1280, alto=720, fps=25.0,
+                 tamano_chunk=None, jitter=0.0, retardo_activacion=0.0, content_length=True, rafaga=1):
+        self.camaras = camaras
+        self.fps = fps
+        self.tamano_chunk = tamano_chunk
+        self.jitter = jitter
+        self.retardo_activacion = retardo_activacion
+        self.content_length = content_length
+        self.rafaga = max(1, rafaga)
+        self.frames = generar_frames(ancho, alto)
+        self.activa = False
+        self.bytes_enviados = 0
+        self._activa_desde = None
+
+        servidor = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                servidor.atender(self)
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", puerto), Handler)
+        self.httpd.daemon_threads = True
+        self._hilo = None
+
+    @property
+    def url(self):
+        host, puerto = self.httpd.server_address[:2]
+        return f"http://{host}:{puerto}"
+
+    def iniciar(self):
+        self._hilo = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._hilo.start()
+        return self
+
+    def detener(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def atender(self, handler):
+        ruta = handler.path.split("?")[0]
+        video = re.fullmatch(r"/video/(\d+)", ruta)
+        if video:
+            self.servir_video(handler, int(video.group(1)))
+        elif ruta == "/activar-camara":
+            self._activa_desde = time.monotonic() + self.retardo_activacion
+            self.responder_json(handler, {"mensaje": "Cámaras activadas"})
+        elif ruta == "/listar-camaras":
+            activa = self._activa_desde is not None and time.monotonic() >= self._activa_desde
+            self.responder_json(handler, {"camaras": list(range(self.camaras)), "camara_activa": activa})
+        elif ruta == "/desactivar-camara":
+            self._activa_desde = None
+            self.responder_json(handler, {"mensaje": "Cámaras desactivadas"})
+        else:
+            self.responder_json(handler, {"detail": "No encontrado"}, 404)
+
+    def responder_json(self, handler, datos, estado=200):
+        cuerpo = json.dumps(datos).encode("utf-8")
+        handler.send_response(estado)
+        handler.send_header("Content-Type", "application/json")
+        handler.send_header("Content-Length", str(len(cuerpo)))
+        handler.end_headers()
+        handler.wfile.write(cuerpo)
+
+    def servir_video(self, handler, indice):
+        if indice >= self.camaras:
+            self.responder_json(handler, {"detail": "Cámara no encontrada"}, 404)
+            return
+        handler.send_response(200)
+        handler.send_header("Content-Type", "multipart/x-mixed-replace; boundary=" + BOUNDARY.decode())
+        handler.send_header("Connection", "close")
+        handler.end_headers()
+        handler.close_connection = True
+
+        periodo = 1.0 / self.fps
+        siguiente = time.monotonic()
+        i = indice
+        try:
+            while True:
+                jpg = self.frames[i % len(self.frames)]
+                i += 1
+                marcado = jpg[:2] + COM + struct.pack(">Hd", 10, time.time()) + jpg[2:]
+                cabeceras = b"--" + BOUNDARY + b"\r\nContent-Type: image/jpeg\r\n"
+                if self.content_length:
+                    cabeceras += b"Content-Length: %d\r\n" % len(marcado)
+                parte = cabeceras + b"\r\n" + marcado + b"\r\n"
+                self.escribir(handler.wfile, parte)
+                if i % self.rafaga:
+                    # Dentro de la ráfaga: el siguiente frame sale ya
+                    continue
+
+                siguiente += periodo * self.rafaga
+                if self.jitter:
+                    siguiente += random.uniform(-self.jitter, self.jitter)
+                espera = siguiente - time.monotonic()
+                if espera > 0:
+                    time.sleep(espera)
+                else:
+                    siguiente = time.monotonic()
+        except (BrokenPipeError, ConnectionResetError, OSError):
+            pass
+
+    def escribir(self, wfile, datos):
+        if not self.tamano_chunk:
+            wfile.write(datos)
+        else:
+            for inicio in range(0, len(datos), self.tamano_chunk):
+                wfile.write(datos[inicio:inicio + self.tamano_chunk])
+                wfile.flush()
+        wfile.flush()
+        self.bytes_enviados += len(datos)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Servidor MJPEG local que imita al servidor de cámaras")
+    parser.add_argument("--puerto", type=int, default=8000)
+    parser.add_argument("--camaras", type=int, default=2)
+    parser.add_argument("--resolucion", default="1280x720")
+    parser.add_argument("--fps", type=float, default=25.0)
+    parser.add_argument("--chunk", type=int, default=0, help="bytes por escritura (0 = frame completo)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="desviación máxima por frame, en segundos")
+    parser.add_argument("--rafaga", type=int, default=1, help="frames que se envían seguidos")
+    args = parser.parse_args()
+
+    ancho, alto = (int(v) for v in args.resolucion.lower().split("x"))
+    servidor = ServidorPrueba(args.puerto, args.camaras, ancho, alto, args.fps, args.chunk or None, args.jitter,
+                              rafaga=args.rafaga)
+    print(f"🎬 Servidor de prueba en {servidor.url}")
+    try:
+        servidor.httpd.serve_forever()
+    except KeyboardInterrupt:
+        servidor.detener()
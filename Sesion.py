@@ -0,0 +1,136 @@
+# Sesion.py
+import os
+import pickle
+import threading
+from CacheLocal import CacheLocal
+from ClienteHTTP import TIMEOUT_API, cliente_http
+from PyQt6.QtCore import QThread, pyqtSignal
+
+API_URL = "https://apidetectorcamreturn.onrender.com"
+TTL_SESION = 6 * 3600  # segundos que se confía en la última respuesta de /check-auth
+CLAVE_COOKIES = "cookies"
+CLAVE_AUTH = "check_auth"
+
+
+def datos_servidor(data):
+    """Extrae (ip, puerto, url pública) del servidor de cámaras de la respuesta de /check-auth"""
+    return (
+        data.get("ip_servidor"),
+        data.get("puerto_servidor"),
+        data.get("url_publica_servidor") or data.get("url_publica"),
+    )
+
+
+def url_base_servidor(ip_servidor, puerto_servidor, url_publica):
+    return url_publica if url_publica else f"http://{ip_servidor}:{puerto_servidor}"
+
+
+class Sesion:
+    """Sesión con la API de DetectorCam, con las cookies guardadas en disco.
+
+    La usan tanto la interfaz como la grabación headless, así ambas
+    comparten el mismo inicio de sesión. Las cookies y la última respuesta
+    de /check-auth (el servidor de cámaras a usar) se guardan en la caché
+    JSON, de modo que al reiniciar no hace falta esperar a la API.
+    """
+    COOKIE_FILE = "session_cookies.pkl"  # formato antiguo, se migra a la caché
+
+    def __init__(self, cache=None):
+        self.cache = cache if cache is not None else CacheLocal()
+        self._cookies_cargadas = False
+        self._lock = threading.Lock()
+
+    @property
+    def session(self):
+        """Cliente HTTP de la API del hilo que llama, con las cookies guardadas (importar requests es lento).
+
+        Las sesiones de todos los hilos comparten las cookies: se cargan de
+        la caché una sola vez.
+        """
+        session = cliente_http()
+        with self._lock:
+            if not self._cookies_cargadas:
+                self._cookies_cargadas = True
+                self._cargar_cookies(session.cookies)
+        return session
+
+    def _cargar_cookies(self, tarro):
+        cookies, _ = self.cache.obtener(CLAVE_COOKIES)
+        if cookies:
+            for c in cookies:
+                tarro.set(c["name"], c["value"], domain=c["domain"], path=c["path"],
+                          expires=c.get("expires"), secure=c.get("secure", False))
+        elif os.path.exists(self.COOKIE_FILE):
+            with open(self.COOKIE_FILE, "rb") as f:
+                tarro.update(pickle.load(f))
+            self._guardar_cookies()
+            os.remove(self.COOKIE_FILE)
+
+    def _guardar_cookies(self):
+        self.cache.guardar(CLAVE_COOKIES, [
+            {"name": c.name, "value": c.value, "domain": c.domain, "path": c.path,
+             "expires": c.expires, "secure": c.secure}
+            for c in list(cliente_http().cookies)
+        ])
+
+    def login(self, username, password):
+        response = self.session.post(
+            f"{API_URL}/login",
+            json={"username": username, "password": password},
+            timeout=TIMEOUT_API
+        )
+        if response.status_code == 200:
+            self._guardar_cookies()
+            self.cache.borrar(CLAVE_AUTH)
+        return response
+
+    def datos_en_cache(self):
+        """Última respuesta de /check-auth si aún no ha caducado, sin tocar la red"""
+        data, vigente = self.cache.obtener(CLAVE_AUTH, TTL_SESION)
+        return data if vigente else None
+
+    def invalidar_cache(self):
+        self.cache.borrar(CLAVE_AUTH)
+
+    def check_auth(self):
+        """Datos de /check-auth, o None si no hay sesión válida.
+
+        Si la API no responde se devuelven los últimos datos guardados, aunque
+        hayan caducado: el servidor de cámaras suele seguir en el mismo sitio.
+        """
+        try:
+            resp = self.session.get(f"{API_URL}/check-auth", timeout=TIMEOUT_API)
+        except:
+            data, _ = self.cache.obtener(CLAVE_AUTH)
+            if data is not None:
+                print("⚠️ La API no responde: se usan los datos de sesión guardados")
+            return data
+        if resp.status_code != 200:
+            self.cache.borrar(CLAVE_AUTH)
+            return None
+        data = resp.json()
+        self.cache.guardar(CLAVE_AUTH, data)
+        self._guardar_cookies()
+        return data
+
+    def logout(self):
+        try:
+            self.session.post(f"{API_URL}/logout")
+        except Exception:
+            pass
+        self.session.cookies.clear()
+        self.cache.borrar(CLAVE_COOKIES, CLAVE_AUTH)
+        if os.path.exists(self.COOKIE_FILE):
+            os.remove(self.COOKIE_FILE)
+
+
+class HiloVerificacion(QThread):
+    """Llama a /check-auth fuera del hilo de la GUI; emite los datos o None"""
+    completado = pyqtSignal(object)
+
+    def __init__(self, sesion):
+        super().__init__()
+        self.sesion = sesion
+
+    def run(self):
+        self.completado.emit(self.sesion.check_auth())
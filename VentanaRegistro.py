@@ -5,6 +5,7 @@ from PyQt6.QtWidgets import (
 from PyQt6.QtGui import QFont
 from PyQt6.QtCore import Qt
 import requests
+from ClienteHTTP import TIMEOUT_API, cliente_http
 
 class VentanaRegistro(QDialog):
     API_URL = "https://apidetectorcamreturn.onrender.com/register"  # ✅ Sin espacios
@@ -77,22 +78,22 @@ class VentanaRegistro(QDialog):
             return
 
         try:
-            resp_cliente = requests.post(self.API_URL, json={
+            resp_cliente = cliente_http().post(self.API_URL, json={
                 "username": username,
                 "email": email,
                 "password": pw1,
                 "tipo": "cliente"
-            })
+            }, timeout=TIMEOUT_API)
 
             username_server = f"{username}_server"
             email_server = f"{username}_server@example.com"
 
-            resp_server = requests.post(self.API_URL, json={
+            resp_server = cliente_http().post(self.API_URL, json={
                 "username": username_server,
                 "email": email_server,
                 "password": pw1,
                 "tipo": "server"
-            })
+            }, timeout=TIMEOUT_API)
 
             if resp_cliente.status_code == 200 and resp_server.status_code == 200:
                 QMessageBox.information(self, "Registro exitoso",
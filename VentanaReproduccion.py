@@ -0,0 +1,199 @@
+# VentanaReproduccion.py
+import threading
+import time
+from datetime import datetime
+from BuzonFrame import BuzonFrame
+from Decodificador import Decodificador
+from VideoThread import FrameListo
+from WidgetVideo import WidgetVideo
+from PyQt6.QtWidgets import (
+    QWidget, QLabel, QPushButton, QSlider, QVBoxLayout, QHBoxLayout, QComboBox
+)
+from PyQt6.QtCore import Qt, QThread, QTimer, pyqtSignal
+
+REDUCCION_ARRASTRE = 8  # al arrastrar la barra se decodifica a 1/8 para ir rápido
+INTERVALO_REPRODUCCION = 15  # ms entre comprobaciones del reloj de reproducción
+
+
+class HiloReproduccion(QThread):
+    """Decodifica en segundo plano solo el frame que se pide en cada momento.
+
+    Las peticiones van a un buzón de una plaza: si llegan varias mientras se
+    decodifica (arrastrando la barra), solo se atiende la última.
+    """
+    frame_disponible = pyqtSignal()
+
+    def __init__(self, fuente):
+        super().__init__()
+        self.fuente = fuente
+        self.decodificador = Decodificador()
+        self.peticiones = BuzonFrame()
+        self.buzon = BuzonFrame()
+        self._despertar = threading.Event()
+        self.running = False
+
+    def pedir(self, indice, rapido=False):
+        self.peticiones.poner((indice, rapido))
+        self._despertar.set()
+
+    def run(self):
+        self.running = True
+        while self.running:
+            self._despertar.wait()
+            self._despertar.clear()
+            peticion = self.peticiones.tomar()
+            if peticion is None or not self.running:
+                continue
+            indice, rapido = peticion
+            imagen = self.decodificador.procesar(self.fuente.jpeg(indice),
+                                                 REDUCCION_ARRASTRE if rapido else 1)
+            if imagen is not None:
+                avisar, _ = self.buzon.poner(FrameListo(imagen, time.monotonic()))
+                if avisar:
+                    self.frame_disponible.emit()
+
+    def stop(self):
+        self.running = False
+        self._despertar.set()
+        self.wait(3000)
+
+
+class VentanaReproduccion(QWidget):
+    """Reproduce y permite recorrer una fuente de frames JPEG con marcas de tiempo.
+
+    La fuente puede ser una grabación en disco (ArchivoGrabado) o cualquier
+    objeto con `__len__`, `marca_tiempo(i)`, `indice_en(ms)` y `jpeg(i)`.
+    """
+
+    def __init__(self, fuente, titulo="Reproducción"):
+        super().__init__()
+        self.fuente = fuente
+        self.setWindowTitle(titulo)
+        self.resize(960, 640)
+        self.setStyleSheet("background-color: #0A2463; color: #FFFFFF;")
+
+        self.indice = 0
+        self.reproduciendo = False
+        self.velocidad = 1.0
+        self._reloj_inicio = 0.0
+        self._ms_inicio = 0
+
+        self.label_video = WidgetVideo("")
+        self.label_video.setStyleSheet("background: #000000;")
+        self.label_video.setMinimumSize(320, 240)
+
+        self.slider = QSlider(Qt.Orientation.Horizontal)
+        self.slider.setRange(0, max(0, len(fuente) - 1))
+        self.slider.sliderMoved.connect(self.arrastrar)
+        self.slider.sliderReleased.connect(self.soltar)
+        self.slider.valueChanged.connect(self.valor_cambiado)
+
+        self.boton_play = QPushButton("▶")
+        self.boton_play.setStyleSheet("background-color: #1E3A8A; border-radius: 15px; padding: 5px;")
+        self.boton_play.clicked.connect(self.alternar_reproduccion)
+
+        self.combo_velocidad = QComboBox()
+        self.combo_velocidad.addItems(["0.5x", "1x", "2x", "4x", "8x"])
+        self.combo_velocidad.setCurrentText("1x")
+        self.combo_velocidad.currentTextChanged.connect(self.cambiar_velocidad)
+
+        self.label_tiempo = QLabel("")
+
+        controles = QHBoxLayout()
+        controles.addWidget(self.boton_play)
+        controles.addWidget(self.slider, 1)
+        controles.addWidget(self.combo_velocidad)
+        controles.addWidget(self.label_tiempo)
+
+        layout = QVBoxLayout(self)
+        layout.addWidget(self.label_video, 1)
+        layout.addLayout(controles)
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(INTERVALO_REPRODUCCION)
+        self.timer.timeout.connect(self.avanzar)
+
+        self.hilo = HiloReproduccion(fuente)
+        self.hilo.frame_disponible.connect(self.mostrar_frame)
+        self.hilo.start()
+
+        if len(fuente):
+            self.ir_a(0)
+        else:
+            self.label_video.setText("La grabación no tiene frames")
+
+    def ir_a(self, indice, rapido=False):
+        self.indice = indice
+        self.hilo.pedir(indice, rapido)
+        self.label_tiempo.setText(self.texto_tiempo(indice))
+        if self.slider.value() != indice:
+            self.slider.blockSignals(True)
+            self.slider.setValue(indice)
+            self.slider.blockSignals(False)
+
+    def texto_tiempo(self, indice):
+        ms = self.fuente.marca_tiempo(indice)
+        return datetime.fromtimestamp(ms / 1000).strftime("%Y-%m-%d %H:%M:%S.") + f"{ms % 1000:03d}"
+
+    def arrastrar(self, indice):
+        self.ir_a(indice, rapido=True)
+
+    def soltar(self):
+        self.ir_a(self.slider.value())
+        self._reiniciar_reloj()
+
+    def valor_cambiado(self, indice):
+        if not self.slider.isSliderDown():
+            self.ir_a(indice)
+            self._reiniciar_reloj()
+
+    def alternar_reproduccion(self):
+        if not len(self.fuente):
+            return
+        self.reproduciendo = not self.reproduciendo
+        self.boton_play.setText("⏸" if self.reproduciendo else "▶")
+        if self.reproduciendo:
+            if self.indice >= len(self.fuente) - 1:
+                self.ir_a(0)
+            self._reiniciar_reloj()
+            self.timer.start()
+        else:
+            self.timer.stop()
+
+    def cambiar_velocidad(self, texto):
+        self.velocidad = float(texto.rstrip("x"))
+        self._reiniciar_reloj()
+
+    def _reiniciar_reloj(self):
+        self._reloj_inicio = time.monotonic()
+        self._ms_inicio = self.fuente.marca_tiempo(self.indice) if len(self.fuente) else 0
+
+    def avanzar(self):
+        """Busca el frame que toca según el reloj y solo lo pide si ha cambiado"""
+        if self.slider.isSliderDown():
+            return
+        ms = self._ms_inicio + (time.monotonic() - self._reloj_inicio) * 1000 * self.velocidad
+        indice = self.fuente.indice_en(ms)
+        if indice != self.indice:
+            self.ir_a(indice)
+        if indice >= len(self.fuente) - 1:
+            self.alternar_reproduccion()
+
+    def mostrar_frame(self):
+        frame = self.hilo.buzon.tomar()
+        if frame is not None:
+            self.label_video.mostrar_imagen(frame.imagen)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.hilo.decodificador.set_tamano_destino(self.label_video.width(), self.label_video.height())
+        if len(self.fuente) and not self.reproduciendo:
+            self.hilo.pedir(self.indice)
+
+    def closeEvent(self, event):
+        self.timer.stop()
+        self.hilo.stop()
+        cerrar = getattr(self.fuente, "cerrar", None)
+        if cerrar:
+            cerrar()
+        event.accept()
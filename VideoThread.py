@@ -0,0 +1,459 @@
+# VideoThread.py
+import random
+import socket
+import threading
+import time
+from collections import deque, namedtuple
+from BuzonFrame import BuzonFrame
+from ClienteHTTP import TIMEOUT_STREAM, cliente_camaras
+from Decodificador import Decodificador, dimensiones_jpeg, huella_jpeg
+from DetectorMovimiento import dibujar_cajas
+from Metricas import MetricasStream
+from ParserMJPEG import ParserMJPEG, boundary_de_respuesta, leer_bloque
+from PyQt6.QtCore import QThread, pyqtSignal
+
+RECONEXION_INICIAL = 0.5  # segundos
+RECONEXION_MAXIMA = 15.0
+ESPERA_CIERRE_MS = 1000  # al salir: máximo por hilo que aún se está deteniendo
+
+# Hilos detenidos que aún no han terminado: se guarda la referencia hasta `finished`
+# para que Qt no destruya un QThread en marcha
+_deteniendose = set()
+
+# Lo que el hilo deja en el buzón: imagen RGB lista para pintar, instante de llegada del JPEG
+# y, si lo decodificó el MotorDecodificacion, el slot de memoria compartida que ocupa
+FrameListo = namedtuple("FrameListo", ["imagen", "llegada", "slot"], defaults=(None,))
+
+
+def esperar_detenidos(ms=ESPERA_CIERRE_MS):
+    """Espera a los hilos que se están deteniendo; solo al cerrar la aplicación"""
+    for hilo in list(_deteniendose):
+        hilo.wait(ms)
+
+
+def cortar_respuesta(respuesta):
+    """Corta el socket de una respuesta en streaming desde otro hilo.
+
+    shutdown despierta al instante un recv bloqueado (close no lo hace en
+    todas las plataformas); el hilo que lee cierra luego la respuesta.
+    """
+    raw = getattr(respuesta, "raw", None)
+    sock = getattr(getattr(raw, "connection", None), "sock", None)
+    if sock is None:
+        # Con "Connection: close" http.client suelta el socket de la conexión
+        # y solo lo conserva el fichero de la respuesta (SocketIO)
+        fichero = getattr(getattr(raw, "_fp", None), "fp", None)
+        sock = getattr(getattr(fichero, "raw", None), "_sock", None)
+    if sock is None:
+        return
+    try:
+        sock.shutdown(socket.SHUT_RDWR)
+    except OSError:
+        pass
+
+
+def liberar_frame(frame):
+    """Devuelve al motor el slot de un FrameListo ya pintado o descartado"""
+    if frame is not None and frame.slot is not None:
+        frame.slot.liberar()
+
+
+class VideoThread(QThread):
+    frame_disponible = pyqtSignal()
+    error_occurred = pyqtSignal(str)
+    reconectando = pyqtSignal(int, float)
+    reconectado = pyqtSignal(int, float)
+    movimiento_detectado = pyqtSignal(list)
+
+    def __init__(self, url, fps_maximo=None, activo=True, limite_inactividad=None, reconectar=False,
+                 motor=None):
+        super().__init__()
+        self.url = url
+        self.running = False
+        # La GUI al recoger un frame despierta al decodificador para el siguiente
+        self.buzon = BuzonFrame(al_tomar=self._avisar)
+        self.decodificador = Decodificador()
+        self.frames_sin_decodificar = 0
+        self.fps_maximo = fps_maximo
+        self._ultima_publicacion = 0.0
+        # Inactivo: se parsea el stream pero solo se guarda el último JPEG, sin decodificar
+        self.activo = activo
+        self.limite_inactividad = limite_inactividad
+        self._inactivo_desde = time.monotonic()
+        self.pendiente = None
+        self.llegada_pendiente = 0.0
+        # Con BufferJitter: (jpg, llegada) que siguen a `pendiente`, para publicarlos en orden
+        self._cola = None
+        self._lock = threading.Lock()
+        self._condicion = threading.Condition(self._lock)
+        self._hilo_decodificacion = None
+        # Reconexión automática: el último frame sigue en pantalla mientras tanto
+        self.reconectar = reconectar
+        self.reconexiones = 0
+        self.tiempo_caido = 0.0
+        self._caido_desde = None
+        self._intento = 0
+        self._despertar = threading.Event()
+        self.metricas = MetricasStream(url)
+        # Funciones (jpg, marca_tiempo) que reciben cada JPEG tal cual llega, en el hilo de video
+        self.receptores = []
+        self.detector = None
+        self.cajas_movimiento = []
+        # Huella del último JPEG decodificado: si el siguiente es igual no se vuelve a decodificar
+        self._ultima_huella = None
+        # MotorDecodificacion opcional; mientras decodifica un frame no se encarga otro
+        self.motor = motor
+        self._en_vuelo = False
+        # Huella del último JPEG que el motor no pudo decodificar: ese se decodifica aquí
+        self._rechazado_motor = None
+        # Respuesta HTTP en curso, para que stop() pueda cortarla desde la GUI
+        self._respuesta = None
+        self.finished.connect(self._detenido)
+
+    def set_activo(self, activo):
+        """Activa o suspende la decodificación. Al activar se publica enseguida el último JPEG recibido.
+
+        Se llama desde la GUI: solo cambia el estado y avisa, la decodificación
+        la hace el hilo del stream.
+        """
+        with self._lock:
+            self.activo = activo
+            self._inactivo_desde = time.monotonic()
+            if self._cola is not None:
+                # Al volver a mostrarse solo interesa el último
+                self._cola.clear()
+            # El widget puede estar mostrando otra cámara: el primer frame se publica siempre
+            self._ultima_huella = None
+        self._avisar()
+
+    def set_cola(self, profundidad):
+        """Publica en orden hasta `profundidad` JPEG por decodificar en lugar de solo el último.
+
+        Para el BufferJitter: si se quedase solo con el último de cada
+        ráfaga, el buffer nunca vería la ráfaga que tiene que suavizar. Con
+        0 se vuelve a publicar solo el más reciente.
+        """
+        with self._lock:
+            self._cola = deque(maxlen=profundidad) if profundidad > 0 else None
+
+    def set_detector(self, detector):
+        """Activa (o con None desactiva) la detección de movimiento sobre los frames recibidos"""
+        self.detector = detector
+        self.cajas_movimiento = []
+        self._ultima_huella = None
+
+    def _detectar_movimiento(self, jpg):
+        detector = self.detector
+        if detector is None or not detector.toca_analizar():
+            return
+        cajas = detector.analizar(jpg)
+        if cajas is None or (not cajas and not self.cajas_movimiento):
+            return
+        self.cajas_movimiento = cajas
+        self._ultima_huella = None
+        self.movimiento_detectado.emit(cajas)
+
+    def agregar_receptor(self, receptor):
+        """Registra una función que recibe cada JPEG sin decodificar (memoryview válida solo durante la llamada)"""
+        self.receptores.append(receptor)
+
+    def _inactividad_agotada(self):
+        return (not self.activo and self.limite_inactividad is not None
+                and time.monotonic() - self._inactivo_desde > self.limite_inactividad)
+
+    def set_tamano_destino(self, ancho, alto):
+        if (ancho, alto) != self.decodificador.tamano_destino:
+            self._ultima_huella = None
+        self.decodificador.set_tamano_destino(ancho, alto)
+
+    def set_fps_maximo(self, fps_maximo):
+        """Limita los frames decodificados por segundo (None para no limitar)"""
+        self.fps_maximo = fps_maximo
+
+    def _toca_publicar(self):
+        if not self.fps_maximo:
+            return True
+        return time.monotonic() - self._ultima_publicacion >= 1.0 / self.fps_maximo
+
+    def _decodificando(self):
+        """Hay un frame encargado que aún no ha llegado al buzón"""
+        return self._en_vuelo
+
+    def _puede_publicar(self):
+        return (self.pendiente is not None and self.activo and not self.buzon.ocupado()
+                and not self._decodificando() and self._toca_publicar())
+
+    def _espera_publicacion(self):
+        """Segundos hasta que el límite de fps deje publicar, o None si se espera un aviso"""
+        if (self.pendiente is None or not self.activo or self.buzon.ocupado() or self._decodificando()
+                or not self.fps_maximo):
+            return None
+        return max(0.0, self._ultima_publicacion + 1.0 / self.fps_maximo - time.monotonic())
+
+    def _tomar_pendiente(self):
+        """Con el lock tomado: saca el JPEG a publicar y deja pendiente el siguiente de la cola"""
+        jpg, llegada = self.pendiente, self.llegada_pendiente
+        self.pendiente = None
+        if self._cola:
+            self.pendiente, self.llegada_pendiente = self._cola.popleft()
+        return jpg, llegada
+
+    def _avisar(self):
+        """Algo cambió (JPEG nuevo, buzón libre, activación...): se revisa si toca publicar"""
+        with self._condicion:
+            self._condicion.notify()
+
+    @property
+    def frames_descartados(self):
+        """Frames que nunca llegaron a pantalla: sin decodificar más los reemplazados en el buzón"""
+        return self.frames_sin_decodificar + self.buzon.descartados
+
+    def start(self):
+        # Aquí y no en run(): un stop() justo tras start() no se pierde
+        self.running = True
+        super().start()
+
+    def run(self):
+        self._hilo_decodificacion = threading.Thread(target=self._bucle_decodificacion,
+                                                     name=f"decodificacion {self.url}", daemon=True)
+        self._hilo_decodificacion.start()
+        try:
+            while self.running:
+                error_msg = None
+                try:
+                    if self._leer_stream():
+                        break
+                except Exception as e:
+                    error_msg = f"Error en stream: {str(e)}"
+                if not self.running:
+                    break
+                espera = self._tras_desconexion(error_msg)
+                if espera is None:
+                    break
+                self._despertar.wait(espera)
+        finally:
+            self.running = False
+            self._avisar()
+            self._hilo_decodificacion.join()
+
+    def _bucle_decodificacion(self):
+        """Publica el último JPEG recibido en cuanto el buzón queda libre.
+
+        Va en un hilo aparte del que lee: si decodificase el lector, un
+        frame pendiente esperaría al siguiente trozo de red aunque la GUI ya
+        hubiese recogido el anterior.
+        """
+        while True:
+            with self._condicion:
+                while self.running and not self._puede_publicar():
+                    self._condicion.wait(self._espera_publicacion())
+                if not self.running:
+                    return
+                jpg, llegada = self._tomar_pendiente()
+            try:
+                self.publicar(jpg, llegada)
+            except Exception as e:
+                print(f"⚠️ Error decodificando {self.url}: {e}")
+
+    def _tras_desconexion(self, error_msg):
+        """Segundos hasta el siguiente intento tras perder la conexión, o None si no se reconecta"""
+        if not self.reconectar:
+            if error_msg:
+                print(f"❌ {error_msg}")
+                self.error_occurred.emit(error_msg)
+            return None
+        error_msg = error_msg or "El servidor cerró el stream"
+
+        if self._caido_desde is None:
+            self._caido_desde = time.monotonic()
+            self._intento = 0
+        # Espera exponencial con jitter para no reconectar todos a la vez
+        espera = min(RECONEXION_MAXIMA, RECONEXION_INICIAL * 2 ** self._intento) * random.uniform(0.5, 1.0)
+        self._intento += 1
+        print(f"🔄 {error_msg}. Reconectando en {espera:.1f}s (intento {self._intento})")
+        self.reconectando.emit(self._intento, espera)
+        return espera
+
+    def _leer_stream(self):
+        """Lee el stream hasta que se corta. Devuelve True si hay que cerrar sin reconectar"""
+        respuesta = None
+        try:
+            respuesta = cliente_camaras().get(self.url, stream=True, timeout=TIMEOUT_STREAM)
+            self._respuesta = respuesta
+            if not self.running:
+                # stop() llegó mientras se conectaba
+                return True
+            respuesta.raise_for_status()
+            # Se lee del socket sin capas intermedias: read1 devuelve lo que haya llegado
+            stream = respuesta.raw
+            parser = ParserMJPEG(boundary_de_respuesta(respuesta))
+            while self.running:
+                if self._inactividad_agotada():
+                    print(f"💤 Cerrando conexión en reserva sin uso: {self.url}")
+                    return True
+                chunk = leer_bloque(stream)
+                if not chunk:
+                    return False
+                self.metricas.bytes_red += len(chunk)
+                parser.alimentar(chunk)
+                self._procesar_frames(parser.frames())
+            return True
+        finally:
+            self._respuesta = None
+            try:
+                respuesta.close()
+            except:
+                pass
+
+    def _procesar_frames(self, frames):
+        """Reparte los JPEG recién parseados a los receptores y deja el último pendiente de publicar.
+
+        Con cola (`set_cola`) quedan pendientes todos, en orden. Las
+        memoryviews de `frames` solo valen durante la llamada: lo que haya
+        que guardar se copia.
+        """
+        ultimo = None
+        marca_tiempo = time.time()
+        en_orden = self._cola is not None and self.activo
+        nuevos = []
+        for jpg in frames:
+            self.metricas.frames_parseados += 1
+            for receptor in self.receptores:
+                receptor(jpg, marca_tiempo)
+            if en_orden:
+                nuevos.append(bytes(jpg))
+            elif ultimo is not None:
+                self.frames_sin_decodificar += 1
+            ultimo = jpg
+        if ultimo is None:
+            return
+        if self._caido_desde is not None:
+            self._registrar_reconexion()
+        self._detectar_movimiento(ultimo)
+        llegada = time.monotonic()
+        with self._lock:
+            if nuevos and self._cola is not None:
+                for jpg in nuevos:
+                    if len(self._cola) == self._cola.maxlen:
+                        self.frames_sin_decodificar += 1
+                    self._cola.append((jpg, llegada))
+                if self.pendiente is None:
+                    self.pendiente, self.llegada_pendiente = self._cola.popleft()
+            else:
+                if self.pendiente is not None:
+                    self.frames_sin_decodificar += 1
+                # Se copia: quien lo decodifica no es este hilo y la memoryview caduca
+                self.pendiente = bytes(ultimo)
+                self.llegada_pendiente = llegada
+        self._avisar()
+
+    def _registrar_reconexion(self):
+        caida = time.monotonic() - self._caido_desde
+        self._caido_desde = None
+        self.reconexiones += 1
+        self.tiempo_caido += caida
+        print(f"✅ Stream recuperado tras {caida:.1f}s (reconexiones: {self.reconexiones})")
+        self.reconectado.emit(self.reconexiones, self.tiempo_caido)
+
+    def publicar(self, jpg, llegada):
+        self._ultima_publicacion = time.monotonic()
+        huella = huella_jpeg(jpg)
+        if huella == self._ultima_huella:
+            # Escena estática: lo que hay en pantalla ya es este frame
+            self.metricas.registrar_repetido()
+            return
+        if (self.motor is not None and huella != self._rechazado_motor
+                and self._encargar_al_motor(jpg, llegada, huella)):
+            return
+        t0 = time.perf_counter()
+        frame = self.decodificador.decodificar(jpg)
+        if frame is None:
+            self._ultima_huella = None
+            return
+        self._ultima_huella = huella
+        t1 = time.perf_counter()
+        if self.cajas_movimiento:
+            dibujar_cajas(frame, self.cajas_movimiento)
+        imagen = self.decodificador.renderizar(frame)
+        t2 = time.perf_counter()
+        self.metricas.registrar_decodificacion((t1 - t0) * 1000.0, (t2 - t1) * 1000.0)
+        self._entregar(FrameListo(imagen, llegada))
+
+    def _encargar_al_motor(self, jpg, llegada, huella):
+        """Encarga el JPEG al motor. False si hay que decodificarlo aquí"""
+        dimensiones = dimensiones_jpeg(jpg)
+        if dimensiones is None:
+            return False
+        ancho, alto = self.decodificador.tamano_salida(*dimensiones)
+        if ancho * alto * 3 > self.motor.tamano_slot:
+            # Ventana más grande que un slot (p. ej. maximizada en un monitor de más de 1080p)
+            return False
+        jpg = bytes(jpg)
+
+        def terminado(slot, decodificacion_ms, escalado_ms):
+            # Hilo de resultados del pool
+            try:
+                if slot is None:
+                    self._ultima_huella = None
+                    self._devolver_pendiente(jpg, llegada, huella)
+                elif not self.activo or not self.running:
+                    slot.liberar()
+                else:
+                    self.metricas.registrar_decodificacion(decodificacion_ms, escalado_ms)
+                    self._entregar(FrameListo(slot.imagen, llegada, slot))
+            finally:
+                self._en_vuelo = False
+                self._avisar()
+
+        self._en_vuelo = True
+        if self.motor.decodificar(jpg, self.decodificador.tamano_destino, self.cajas_movimiento, terminado):
+            self._ultima_huella = huella
+            return True
+        self._en_vuelo = False
+        return False
+
+    def _devolver_pendiente(self, jpg, llegada, huella):
+        """El motor no pudo con este JPEG: vuelve a quedar pendiente para decodificarlo en el hilo"""
+        with self._lock:
+            self._rechazado_motor = huella
+            if self._cola is not None and self.pendiente is not None:
+                # En orden: vuelve delante de los que llegaron después
+                self._cola.appendleft((self.pendiente, self.llegada_pendiente))
+                self.pendiente = None
+            if self.pendiente is None:
+                # Si ya llegó uno más nuevo, se publica ese
+                self.pendiente = jpg
+                self.llegada_pendiente = llegada
+
+    def _entregar(self, frame):
+        avisar, reemplazado = self.buzon.poner(frame)
+        liberar_frame(reemplazado)
+        if avisar:
+            self.frame_disponible.emit()
+
+    def vaciar_buzon(self):
+        liberar_frame(self.buzon.tomar())
+
+    def segundos_caido(self):
+        """Tiempo total sin stream, incluida la caída en curso si la hay"""
+        caido_desde = self._caido_desde
+        en_curso = time.monotonic() - caido_desde if caido_desde is not None else 0.0
+        return self.tiempo_caido + en_curso
+
+    def instantanea_metricas(self):
+        return self.metricas.instantanea(self.frames_descartados, self.reconexiones, self.segundos_caido())
+
+    def stop(self):
+        """Detiene el hilo sin bloquear: corta la conexión y termina en segundo plano"""
+        self.running = False
+        self._despertar.set()
+        self._avisar()
+        cortar_respuesta(self._respuesta)
+        self.vaciar_buzon()
+        if self.isRunning():
+            _deteniendose.add(self)
+
+    def _detenido(self):
+        _deteniendose.discard(self)
+        # Lo que llegase a dejar en el buzón antes de ver running a False
+        self.vaciar_buzon()
@@ -0,0 +1,147 @@
+# VistaMosaico.py
+import math
+from VideoThread import VideoThread, liberar_frame
+from WidgetVideo import WidgetVideo
+from DetectorMovimiento import DetectorMovimiento
+from PyQt6.QtWidgets import QWidget, QGridLayout
+from PyQt6.QtCore import pyqtSignal
+
+FPS_MOSAICO = 10
+ESTILO_CELDA = "background: #000000; color: #FFFFFF; border-radius: 0px;"
+ESTILO_MOVIMIENTO = ESTILO_CELDA + " border: 3px solid #FF0000;"
+
+
+class CeldaVideo(WidgetVideo):
+    """Celda del mosaico: un stream propio decodificado al tamaño de la celda"""
+    doble_click = pyqtSignal(int)
+
+    def __init__(self, indice, url, fps_maximo=FPS_MOSAICO, buffer_repeticion=None, motor=None, reactor=None):
+        super().__init__("")
+        self.indice = indice
+        self.en_pantalla = True
+        self.setStyleSheet(ESTILO_CELDA)
+        self.setMinimumSize(80, 60)
+
+        if reactor is not None:
+            from ReactorStreams import StreamReactor
+            self.video_thread = StreamReactor(reactor, url, fps_maximo=fps_maximo, reconectar=True, motor=motor)
+        else:
+            self.video_thread = VideoThread(url, fps_maximo=fps_maximo, reconectar=True, motor=motor)
+        self.video_thread.frame_disponible.connect(self.mostrar_frame)
+        self.video_thread.error_occurred.connect(self.mostrar_error)
+        self.video_thread.movimiento_detectado.connect(self.mostrar_movimiento)
+        if buffer_repeticion is not None:
+            self.video_thread.agregar_receptor(buffer_repeticion.agregar)
+
+    def iniciar(self):
+        self.setText(f"Cámara {self.indice + 1}")
+        self.video_thread.set_tamano_destino(self.width(), self.height())
+        self.video_thread.start()
+
+    def detener(self):
+        try:
+            self.video_thread.frame_disponible.disconnect()
+        except:
+            pass
+        self.video_thread.stop()
+
+    def mostrar_frame(self):
+        frame = self.video_thread.buzon.tomar()
+        if frame is not None:
+            self.mostrar_imagen(frame.imagen)
+            self.video_thread.metricas.registrar_mostrado(frame.llegada)
+            liberar_frame(frame)
+
+    def set_en_pantalla(self, en_pantalla):
+        self.en_pantalla = en_pantalla
+        self.actualizar_actividad()
+
+    def actualizar_actividad(self):
+        """Solo decodifica si la celda se ve; oculta mantiene la conexión y el último JPEG"""
+        activa = self.en_pantalla and not self.isHidden()
+        if activa != self.video_thread.activo:
+            self.video_thread.set_activo(activa)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.actualizar_actividad()
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self.actualizar_actividad()
+
+    def mostrar_movimiento(self, cajas):
+        self.setStyleSheet(ESTILO_MOVIMIENTO if cajas else ESTILO_CELDA)
+
+    def mostrar_error(self, error_msg):
+        self.setText(f"Cámara {self.indice + 1}\n{error_msg}")
+
+    def resizeEvent(self, event):
+        self.video_thread.set_tamano_destino(event.size().width(), event.size().height())
+        super().resizeEvent(event)
+
+    def mouseDoubleClickEvent(self, event):
+        self.doble_click.emit(self.indice)
+
+
+class VistaMosaico(QWidget):
+    """Muestra todas las cámaras a la vez, cada una con su propio stream.
+
+    Doble clic sobre una celda la amplía a toda la vista (sin reconectar y
+    sin límite de fps); otro doble clic vuelve al mosaico.
+    """
+    camara_ampliada = pyqtSignal(int)
+
+    def __init__(self, url_base, num_camaras, fps_maximo=FPS_MOSAICO, buffer_de_camara=None, motor=None,
+                 reactor=None):
+        super().__init__()
+        self.fps_maximo = fps_maximo
+        self.ampliada = None
+        self.celdas = []
+
+        layout = QGridLayout(self)
+        layout.setSpacing(4)
+        layout.setContentsMargins(0, 0, 0, 0)
+        columnas = max(1, math.ceil(math.sqrt(num_camaras)))
+        for i in range(num_camaras):
+            buffer = buffer_de_camara(i) if buffer_de_camara else None
+            celda = CeldaVideo(i, f"{url_base}/video/{i}", fps_maximo, buffer, motor, reactor)
+            celda.doble_click.connect(self.alternar_ampliacion)
+            layout.addWidget(celda, i // columnas, i % columnas)
+            self.celdas.append(celda)
+
+    def iniciar(self):
+        for celda in self.celdas:
+            celda.iniciar()
+
+    def detener(self):
+        for celda in self.celdas:
+            celda.detener()
+        self.celdas = []
+
+    def instantaneas_metricas(self):
+        return [celda.video_thread.instantanea_metricas() for celda in self.celdas]
+
+    def set_en_pantalla(self, en_pantalla):
+        for celda in self.celdas:
+            celda.set_en_pantalla(en_pantalla)
+
+    def set_deteccion_movimiento(self, activa):
+        for celda in self.celdas:
+            celda.video_thread.set_detector(DetectorMovimiento.desde_entorno() if activa else None)
+            if not activa:
+                celda.mostrar_movimiento([])
+
+    def alternar_ampliacion(self, indice):
+        if self.ampliada is None:
+            for celda in self.celdas:
+                if celda.indice != indice:
+                    celda.hide()
+            self.celdas[indice].video_thread.set_fps_maximo(None)
+            self.ampliada = indice
+            self.camara_ampliada.emit(indice)
+        else:
+            self.celdas[self.ampliada].video_thread.set_fps_maximo(self.fps_maximo)
+            for celda in self.celdas:
+                celda.show()
+            self.ampliada = None
@@ -0,0 +1,75 @@
+# WidgetVideo.py
+from PyQt6.QtWidgets import QLabel, QSizePolicy
+from PyQt6.QtGui import QImage, QPainter
+from PyQt6.QtCore import Qt, QRect
+
+
+class WidgetVideo(QLabel):
+    """Pinta los frames RGB del hilo de video sobre una QImage reutilizable.
+
+    Mostrar un frame no crea ningún QPixmap ni pasa por el cálculo de tamaño
+    del QLabel: los píxeles se copian sobre el buffer existente y se pide un
+    repintado. La imagen se encaja conservando la proporción. Hereda de
+    QLabel para que los mensajes con setText se sigan mostrando igual.
+    """
+
+    def __init__(self, texto=""):
+        super().__init__(texto)
+        self.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.setSizePolicy(QSizePolicy.Policy.Ignored, QSizePolicy.Policy.Ignored)
+        self._imagen = None
+        self._pixeles = None  # ndarray sobre la memoria de _imagen
+        self._hay_frame = False
+
+    def mostrar_imagen(self, imagen):
+        """Copia un frame RGB (alto x ancho x 3) al buffer y lo repinta"""
+        alto, ancho = imagen.shape[:2]
+        if self._imagen is None or (self._imagen.width(), self._imagen.height()) != (ancho, alto):
+            # Solo se reserva memoria cuando cambia el tamaño del frame. numpy
+            # ya está cargado si llegan frames: importarlo aquí no retrasa el arranque
+            import numpy as np
+            self._imagen = QImage(ancho, alto, QImage.Format.Format_RGB888)
+            bits = self._imagen.bits()
+            bits.setsize(self._imagen.sizeInBytes())
+            filas = np.frombuffer(bits, dtype=np.uint8).reshape(alto, self._imagen.bytesPerLine())
+            self._pixeles = filas[:, :ancho * 3]
+        self._pixeles[:] = imagen.reshape(alto, ancho * 3)
+        if not self._hay_frame:
+            super().clear()
+            self._hay_frame = True
+        self.update()
+
+    def setText(self, texto):
+        self._hay_frame = False
+        super().setText(texto)
+
+    def setPixmap(self, pixmap):
+        self._hay_frame = False
+        super().setPixmap(pixmap)
+
+    def clear(self):
+        self._hay_frame = False
+        super().clear()
+
+    def rect_encajado(self):
+        """Rectángulo centrado con la proporción del frame dentro del área de contenido"""
+        area = self.contentsRect()
+        escala = min(area.width() / self._imagen.width(), area.height() / self._imagen.height())
+        ancho = round(self._imagen.width() * escala)
+        alto = round(self._imagen.height() * escala)
+        return QRect(area.x() + (area.width() - ancho) // 2, area.y() + (area.height() - alto) // 2, ancho, alto)
+
+    def paintEvent(self, event):
+        # QLabel pinta el fondo y el borde de la hoja de estilo (y el texto, si lo hay)
+        super().paintEvent(event)
+        if not self._hay_frame:
+            return
+        painter = QPainter(self)
+        destino = self.rect_encajado()
+        if destino.size() == self._imagen.size():
+            painter.drawImage(destino.topLeft(), self._imagen)
+        else:
+            # El widget cambió de tamaño y el hilo aún no entrega frames al nuevo tamaño
+            painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform)
+            painter.drawImage(destino, self._imagen)
+        painter.end()
@@ -0,0 +1,244 @@
+# benchmark.py - mide el camino caliente del cliente contra un ServidorPrueba local en otro proceso
+import argparse
+import multiprocessing
+import os
+import statistics
+import sys
+import threading
+import time
+from ServidorPrueba import ServidorPrueba, generar_frames, marca_envio, BOUNDARY
+from ParserMJPEG import ParserMJPEG
+from VideoThread import VideoThread, liberar_frame
+
+
+def _servir(opciones, urls, parar):
+    """Proceso del servidor: sirve hasta que se activa `parar`"""
+    servidor = ServidorPrueba(**opciones).iniciar()
+    urls.put(servidor.url)
+    parar.wait()
+    servidor.detener()
+
+
+class ProcesoServidor:
+    """ServidorPrueba en un proceso aparte.
+
+    En el mismo proceso, process_time() sumaría al cliente la CPU de
+    codificar y servir cada stream, y "CPU por stream" mezclaría el camino
+    caliente del cliente con el ruido del servidor.
+    """
+
+    def __init__(self, **opciones):
+        # Los mismos frames que sirve el proceso, para medir el parser en memoria
+        self.frames = generar_frames(opciones["ancho"], opciones["alto"])
+        contexto = multiprocessing.get_context("spawn")
+        urls = contexto.Queue()
+        self._parar = contexto.Event()
+        self._proceso = contexto.Process(target=_servir, args=(opciones, urls, self._parar),
+                                         name="servidor-prueba", daemon=True)
+        self._proceso.start()
+        self.url = urls.get(timeout=30)
+
+    def detener(self):
+        self._parar.set()
+        self._proceso.join(5)
+
+
+class VideoThreadMedido(VideoThread):
+    """VideoThread que recuerda cuándo envió el servidor cada JPEG publicado"""
+
+    def __init__(self, url, motor=None):
+        super().__init__(url, motor=motor)
+        self.envios = {}
+
+    def publicar(self, jpg, llegada):
+        envio = marca_envio(jpg)
+        if envio is not None:
+            self.envios[llegada] = envio
+        super().publicar(jpg, llegada)
+
+
+def medir_parser(servidor, tamano_chunk, repeticiones=20):
+    """MB/s del ParserMJPEG alimentado con un stream ya generado en memoria"""
+    partes = []
+    for jpg in servidor.frames:
+        partes.append(b"--" + BOUNDARY + b"\r\nContent-Type: image/jpeg\r\n"
+                      + b"Content-Length: %d\r\n\r\n" % len(jpg) + jpg + b"\r\n")
+    stream = memoryview(b"".join(partes) * repeticiones)
+    resultados = {}
+    for content_length in (True, False):
+        datos = stream if content_length else memoryview(b"".join(servidor.frames) * repeticiones)
+        parser = ParserMJPEG(BOUNDARY if content_length else None)
+        frames = 0
+        t0 = time.perf_counter()
+        for inicio in range(0, len(datos), tamano_chunk):
+            parser.alimentar(datos[inicio:inicio + tamano_chunk])
+            for _ in parser.frames():
+                frames += 1
+        segundos = time.perf_counter() - t0
+        resultados["content_length" if content_length else "marcadores"] = (
+            len(datos) / segundos / 1e6, frames / segundos)
+    return resultados
+
+
+def medir_headless(app, servidor, args, destino, motor=None):
+    hilos = []
+    latencias = []
+    mostrados = [0]
+
+    def consumidor(hilo):
+        def tomar():
+            frame = hilo.buzon.tomar()
+            if frame is None:
+                return
+            mostrados[0] += 1
+            hilo.metricas.registrar_mostrado(frame.llegada)
+            liberar_frame(frame)
+            envio = hilo.envios.pop(frame.llegada, None)
+            if envio is not None:
+                latencias.append((time.time() - envio) * 1000.0)
+        return tomar
+
+    for i in range(args.camaras):
+        hilo = VideoThreadMedido(f"{servidor.url}/video/{i}", motor)
+        hilo.set_tamano_destino(*destino)
+        hilo.frame_disponible.connect(consumidor(hilo))
+        hilos.append(hilo)
+
+    cpu0, t0 = time.process_time(), time.perf_counter()
+    for hilo in hilos:
+        hilo.start()
+    ejecutar_durante(app, args.duracion)
+    cpu, segundos = time.process_time() - cpu0, time.perf_counter() - t0
+    for hilo in hilos:
+        hilo.stop()
+
+    bytes_red = sum(h.metricas.bytes_red for h in hilos)
+    decodificados = sum(h.metricas.frames_decodificados for h in hilos)
+    return {
+        "red_MBs": bytes_red / segundos / 1e6,
+        "fps_decodificados": decodificados / segundos,
+        "fps_mostrados": mostrados[0] / segundos,
+        "descartados": sum(h.frames_descartados for h in hilos),
+        "latencia_p50_ms": percentil(latencias, 50),
+        "latencia_p95_ms": percentil(latencias, 95),
+        "cpu_por_stream_pct": cpu / segundos / args.camaras * 100.0,
+    }
+
+
+def medir_widget(app, servidor, args, reactor=None):
+    from PyQt6.QtWidgets import QMainWindow
+    from VistaMosaico import VistaMosaico
+
+    ventana = QMainWindow()
+    mosaico = VistaMosaico(servidor.url, args.camaras, fps_maximo=None, reactor=reactor)
+    ventana.setCentralWidget(mosaico)
+    ventana.resize(*args.ventana)
+    ventana.show()
+
+    cpu0, t0 = time.process_time(), time.perf_counter()
+    mosaico.iniciar()
+    ejecutar_durante(app, args.duracion)
+    cpu, segundos = time.process_time() - cpu0, time.perf_counter() - t0
+    hilos_proceso = contar_hilos()
+    hilos = [celda.video_thread for celda in mosaico.celdas]
+    edades = [h.metricas.edad for h in hilos]
+    resultado = {
+        "fps_decodificados": sum(h.metricas.frames_decodificados for h in hilos) / segundos,
+        "fps_mostrados": sum(h.metricas.frames_mostrados for h in hilos) / segundos,
+        "descartados": sum(h.frames_descartados for h in hilos),
+        "edad_p95_ms": max(e.percentil(95) for e in edades),
+        "cpu_por_stream_pct": cpu / segundos / args.camaras * 100.0,
+        "hilos_proceso": hilos_proceso,
+    }
+    mosaico.detener()
+    ventana.close()
+    return resultado
+
+
+def contar_hilos():
+    """Hilos del proceso, incluidos los de Qt y las bibliotecas nativas"""
+    try:
+        return len(os.listdir("/proc/self/task"))
+    except OSError:
+        return threading.active_count()
+
+
+def ejecutar_durante(app, segundos):
+    from PyQt6.QtCore import QTimer
+    QTimer.singleShot(int(segundos * 1000), app.quit)
+    app.exec()
+
+
+def percentil(valores, p):
+    if not valores:
+        return 0.0
+    if len(valores) == 1:
+        return valores[0]
+    return statistics.quantiles(valores, n=100)[min(98, max(0, p - 1))]
+
+
+def imprimir(titulo, datos):
+    print(f"\n== {titulo}")
+    for clave, valor in datos.items():
+        print(f"  {clave:<22} {valor:.2f}" if isinstance(valor, float) else f"  {clave:<22} {valor}")
+
+
+def tamano(texto):
+    ancho, alto = (int(v) for v in texto.lower().split("x"))
+    return ancho, alto
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del cliente DetectorCam contra un servidor MJPEG local")
+    parser.add_argument("--camaras", type=int, default=1)
+    parser.add_argument("--resolucion", type=tamano, default=(1920, 1080))
+    parser.add_argument("--fps", type=float, default=25.0)
+    parser.add_argument("--chunk", type=int, default=0, help="bytes por escritura del servidor (0 = frame completo)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="desviación por frame del servidor, en segundos")
+    parser.add_argument("--destino", type=tamano, default=(640, 360), help="tamaño al que se escala en modo headless")
+    parser.add_argument("--ventana", type=tamano, default=(1280, 720), help="tamaño de la ventana en modo widget")
+    parser.add_argument("--duracion", type=float, default=5.0)
+    parser.add_argument("--widget", action="store_true", help="medir también con la vista mosaico en pantalla")
+    parser.add_argument("--procesos", type=int, default=0,
+                        help="medir también decodificando con un MotorDecodificacion de N procesos")
+    parser.add_argument("--reactor", action="store_true",
+                        help="con --widget, medir también el mosaico servido por un ReactorStreams")
+    args = parser.parse_args()
+
+    if args.widget and not os.environ.get("DISPLAY") and sys.platform.startswith("linux"):
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt6.QtWidgets import QApplication
+    app = QApplication(sys.argv)
+
+    servidor = ProcesoServidor(camaras=args.camaras, ancho=args.resolucion[0], alto=args.resolucion[1],
+                               fps=args.fps, tamano_chunk=args.chunk or None, jitter=args.jitter)
+    print(f"🎬 Servidor de prueba en {servidor.url}: {args.camaras} cámara(s) "
+          f"{args.resolucion[0]}x{args.resolucion[1]} a {args.fps:g} fps")
+    try:
+        for modo, (mbs, fps) in medir_parser(servidor, 64 * 1024).items():
+            imprimir(f"Parser ({modo})", {"MB/s": mbs, "frames/s": fps})
+        imprimir("Headless", medir_headless(app, servidor, args, args.destino))
+        if args.procesos:
+            from MotorDecodificacion import MotorDecodificacion
+            motor = MotorDecodificacion(args.procesos)
+            try:
+                # cpu_por_stream solo cuenta este proceso, no los trabajadores
+                imprimir(f"Headless ({args.procesos} procesos)",
+                         medir_headless(app, servidor, args, args.destino, motor))
+            finally:
+                motor.cerrar()
+        if args.widget:
+            imprimir("Widget (mosaico)", medir_widget(app, servidor, args))
+            if args.reactor:
+                from ReactorStreams import ReactorStreams
+                reactor = ReactorStreams()
+                try:
+                    imprimir("Widget (mosaico, reactor)", medir_widget(app, servidor, args, reactor))
+                finally:
+                    reactor.cerrar()
+    finally:
+        servidor.detener()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,70 +1,38 @@
 # main.py (cliente PyQt6) - versión corregida y limpia
+import time
+INICIO = time.perf_counter()
+
 import sys
-import requests
 import os
-import pickle
 import json
-import cv2
-import numpy as np
-import urllib.request
-from VentanaRegistro import VentanaRegistro
+# cv2, numpy y requests se importan al usarse por primera vez (VideoThread,
+# VistaMosaico, etc.) para que la ventana se pinte sin esperarlos
+from CacheLocal import CacheLocal
+from Entorno import booleano, valor_entorno
+from Sesion import Sesion, HiloVerificacion, datos_servidor, url_base_servidor
+from Metricas import MedidorArranque, VolcadoMetricas, periodo_desde_entorno, texto_metricas
+from Grabador import EXTENSION_SEGMENTO
+from WidgetVideo import WidgetVideo
+from BufferRepeticion import BufferRepeticion, limites_desde_entorno
+from BufferJitter import BufferJitter
 from PyQt6.QtWidgets import (
     QApplication, QWidget, QLabel, QPushButton, QVBoxLayout, QHBoxLayout,
-    QFrame, QLineEdit, QMessageBox
+    QFrame, QLineEdit, QMessageBox, QFileDialog
 )
-from PyQt6.QtGui import QFont, QIcon, QPixmap, QImage
-from PyQt6.QtCore import Qt, QSize, QTimer, QThread, pyqtSignal
-
-
-class VideoThread(QThread):
-    frame_received = pyqtSignal(np.ndarray)
-    error_occurred = pyqtSignal(str)
-
-    def __init__(self, url):
-        super().__init__()
-        self.url = url
-        self.running = False
-
-    def run(self):
-        self.running = True
-        try:
-            stream = urllib.request.urlopen(self.url, timeout=10)
-            bytes_data = bytes()
-            while self.running:
-                chunk = stream.read(1024)
-                if not chunk:
-                    break
-                bytes_data += chunk
-                a = bytes_data.find(b'\xff\xd8')
-                b = bytes_data.find(b'\xff\xd9')
-                if a != -1 and b != -1:
-                    jpg = bytes_data[a:b + 2]
-                    bytes_data = bytes_data[b + 2:]
-                    img_array = np.frombuffer(jpg, dtype=np.uint8)
-                    frame = cv2.imdecode(img_array, cv2.IMREAD_COLOR)
-                    if frame is not None:
-                        self.frame_received.emit(frame)
-        except Exception as e:
-            error_msg = f"Error en stream: {str(e)}"
-            print(f"❌ {error_msg}")
-            self.error_occurred.emit(error_msg)
-        finally:
-            try:
-                stream.close()
-            except:
-                pass
-
-    def stop(self):
-        self.running = False
-        self.wait(3000)
+from PyQt6.QtGui import QFont, QIcon, QPixmap, QKeySequence, QShortcut
+from PyQt6.QtCore import Qt, QSize, QTimer, QEvent
 
 
 class MiInterfaz(QWidget):
-    COOKIE_FILE = "session_cookies.pkl"
+    TIEMPO_RESERVA = 120  # segundos que se mantiene abierta una conexión en reserva sin usar
+    SEGUNDOS_RETROCESO = 30  # al abrir la repetición se empieza este tiempo antes del final
+    ESPERA_CIERRE_MS = 1000  # al salir: máximo por hilo auxiliar que aún no ha terminado
 
     def __init__(self):
         super().__init__()
-        self.session = requests.Session()
+        self.cache = CacheLocal()
+        self.sesion = Sesion(self.cache)
+        self.datos_sesion = None
         self.ip_servidor = None
         self.puerto_servidor = None
         self.url_publica = None
@@ -72,11 +40,39 @@ class MiInterfaz(QWidget):
         self.camara_actual = 0
         self.streaming_activo = False
         self.video_thread = None
-
-        if os.path.exists(self.COOKIE_FILE):
-            with open(self.COOKIE_FILE, "rb") as f:
-                cookies = pickle.load(f)
-                self.session.cookies.update(cookies)
+        self.camara_video = None
+        self.hilos_reserva = {}
+        self.vista_mosaico = None
+        self.hilo_activacion = None
+        # Activaciones canceladas que aún no han terminado su petición en curso
+        self.hilos_cancelados = []
+        self.ventanas_reproduccion = []
+        self.buffers_repeticion = {}
+        self.limites_repeticion = limites_desde_entorno()
+        self.hilos_captura = []
+        self.deteccion_movimiento = False
+        self.hay_movimiento = False
+        # Ventana minimizada, oculta o tapada: los streams siguen abiertos pero sin decodificar
+        self.en_pantalla = True
+        self.hilo_verificacion = None
+        # Decodificación en varios procesos (DETECTORCAM_PROCESOS_DECODIFICACION); se crea al primer stream
+        self.motor_decodificacion = None
+        self._motor_creado = False
+        # Presentación a ritmo constante de la vista individual (DETECTORCAM_JITTER_MS)
+        self.buffer_jitter = BufferJitter.desde_entorno(self.presentar_frame, self.descartar_frame, self)
+        # Un solo hilo de I/O para todos los streams del mosaico (DETECTORCAM_REACTOR)
+        self.reactor_streams = None
+        self._reactor_creado = False
+        # DETECTORCAM_ARRANQUE=1 imprime el tiempo hasta el primer pintado, la sesión y el primer frame
+        self.medidor_arranque = MedidorArranque(INICIO) if valor_entorno("DETECTORCAM_ARRANQUE", False, booleano) else None
+
+        ruta_metricas = os.environ.get("DETECTORCAM_METRICAS")
+        self.volcado_metricas = VolcadoMetricas(ruta_metricas) if ruta_metricas else None
+        self.timer_metricas = QTimer(self)
+        self.timer_metricas.setInterval(round(periodo_desde_entorno() * 1000))
+        self.timer_metricas.timeout.connect(self.actualizar_metricas)
+        if self.volcado_metricas:
+            self.timer_metricas.start()
 
         self.setWindowTitle("DetectorCam")
         self.setGeometry(100, 100, 1200, 800)
@@ -155,6 +151,7 @@ class MiInterfaz(QWidget):
         self.boton_register = QPushButton("Registrarse")
         self.boton_logout = QPushButton("Cerrar sesión")
         self.boton_logout.hide()
+        self.boton_grabaciones = QPushButton("Grabaciones")
 
         self.boton_camara_remota = QPushButton("Activar Cámaras")
         self.boton_camara_remota.setObjectName("boton_camara")
@@ -179,6 +176,7 @@ class MiInterfaz(QWidget):
         self.boton_login.clicked.connect(self.iniciar_sesion)
         self.boton_register.clicked.connect(self.abrir_registro)
         self.boton_logout.clicked.connect(self.cerrar_sesion)
+        self.boton_grabaciones.clicked.connect(self.abrir_grabaciones)
 
         self.menu_widget = QWidget()
         self.menu_layout = QVBoxLayout()
@@ -196,6 +194,7 @@ class MiInterfaz(QWidget):
         self.layout_boton_camara.addWidget(self.boton_camara_remota)
         self.layout_boton_camara.addStretch()
         self.menu_layout.addLayout(self.layout_boton_camara)
+        self.menu_layout.addWidget(self.boton_grabaciones)
 
         self.menu_layout.addStretch(1)
 
@@ -207,10 +206,10 @@ class MiInterfaz(QWidget):
 
         self.layout_area_principal = QVBoxLayout(self.area_principal)
 
-        self.label_video = QLabel("")
-        self.label_video.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.label_video = WidgetVideo("")
         self.label_video.setStyleSheet("background: transparent;")
         self.label_video.setMinimumSize(400, 300)
+        self.label_video.installEventFilter(self)
 
         self.controls_widget = QWidget()
         self.controls_widget.setStyleSheet("background: transparent;")
@@ -231,12 +230,46 @@ class MiInterfaz(QWidget):
         self.boton_siguiente.clicked.connect(self.camara_siguiente)
         self.boton_siguiente.hide()
 
+        self.boton_mosaico = QPushButton("Mosaico")
+        self.boton_mosaico.clicked.connect(self.alternar_mosaico)
+        self.boton_mosaico.hide()
+
+        self.boton_repeticion = QPushButton("Repetición")
+        self.boton_repeticion.clicked.connect(self.abrir_repeticion)
+        self.boton_repeticion.hide()
+
+        self.boton_captura = QPushButton("Captura")
+        self.boton_captura.clicked.connect(self.capturar_camara_actual)
+        self.boton_captura.hide()
+
+        self.boton_captura_todas = QPushButton("Capturar todas")
+        self.boton_captura_todas.clicked.connect(self.capturar_todas)
+        self.boton_captura_todas.hide()
+
+        self.boton_movimiento = QPushButton("Movimiento")
+        self.boton_movimiento.setCheckable(True)
+        self.boton_movimiento.toggled.connect(self.alternar_deteccion_movimiento)
+        self.boton_movimiento.hide()
+
         self.controls_layout.addStretch()
         self.controls_layout.addWidget(self.boton_anterior)
         self.controls_layout.addWidget(self.label_camara_info)
         self.controls_layout.addWidget(self.boton_siguiente)
+        self.controls_layout.addWidget(self.boton_mosaico)
+        self.controls_layout.addWidget(self.boton_repeticion)
+        self.controls_layout.addWidget(self.boton_captura)
+        self.controls_layout.addWidget(self.boton_captura_todas)
+        self.controls_layout.addWidget(self.boton_movimiento)
         self.controls_layout.addStretch()
 
+        self.label_metricas = QLabel("", self.area_principal)
+        self.label_metricas.setStyleSheet(
+            "background-color: rgba(0, 0, 0, 170); color: #7CFC00; font-family: monospace; "
+            "font-size: 11px; border-radius: 4px; padding: 4px;")
+        self.label_metricas.move(10, 10)
+        self.label_metricas.hide()
+        QShortcut(QKeySequence("F3"), self, self.alternar_overlay_metricas)
+
         self.layout_area_principal.addWidget(self.label_video)
         self.layout_area_principal.addWidget(self.controls_widget)
 
@@ -258,9 +291,53 @@ class MiInterfaz(QWidget):
         self.menu_widget.setVisible(not self.menu_widget.isVisible())
 
     def abrir_registro(self):
+        from VentanaRegistro import VentanaRegistro
         ventana = VentanaRegistro()
         ventana.exec()
 
+    def abrir_grabaciones(self):
+        """Abre una ventana de reproducción por cada carpeta de cámara grabada"""
+        directorio = QFileDialog.getExistingDirectory(self, "Carpeta de grabación")
+        if not directorio:
+            return
+        try:
+            carpetas = [directorio]
+            if not any(n.endswith(EXTENSION_SEGMENTO) for n in os.listdir(directorio)):
+                carpetas = sorted(
+                    os.path.join(directorio, n) for n in os.listdir(directorio)
+                    if os.path.isdir(os.path.join(directorio, n))
+                    and any(f.endswith(EXTENSION_SEGMENTO) for f in os.listdir(os.path.join(directorio, n)))
+                )
+        except OSError as e:
+            QMessageBox.warning(self, "Grabaciones", f"No se pudo leer la carpeta: {e}")
+            return
+        if not carpetas:
+            QMessageBox.warning(self, "Sin grabaciones", "La carpeta no contiene segmentos de video.")
+            return
+        from ArchivoGrabado import ArchivoGrabado
+        from VentanaReproduccion import VentanaReproduccion
+        for carpeta in carpetas:
+            nombre = os.path.basename(carpeta)
+            try:
+                archivo = ArchivoGrabado(carpeta)
+            except (OSError, ValueError) as e:
+                # Segmento truncado o vacío, índice .idx dañado, permisos...
+                print(f"❌ No se pudo abrir la grabación {carpeta}: {e}")
+                QMessageBox.warning(self, "Grabaciones", f"No se pudo abrir la grabación {nombre}:\n{e}")
+                continue
+            if not len(archivo):
+                archivo.cerrar()
+                QMessageBox.warning(self, "Grabaciones", f"La grabación {nombre} no contiene frames legibles.")
+                continue
+            self.mostrar_reproduccion(VentanaReproduccion(archivo, f"Reproducción - {nombre}"))
+
+    def mostrar_reproduccion(self, ventana):
+        """Muestra una ventana de reproducción y la olvida al cerrarla"""
+        ventana.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose)
+        ventana.destroyed.connect(lambda *_: self.ventanas_reproduccion.remove(ventana))
+        ventana.show()
+        self.ventanas_reproduccion.append(ventana)
+
     def iniciar_sesion(self):
         username = self.input_usuario_login.text().strip()
         password = self.input_password_login.text().strip()
@@ -269,17 +346,12 @@ class MiInterfaz(QWidget):
             QMessageBox.warning(self, "Campos vacíos", "Por favor, completa todos los campos.")
             return
 
+        import requests
         try:
-            response = self.session.post(
-                "https://apidetectorcamreturn.onrender.com/login",
-                json={"username": username, "password": password}
-            )
+            response = self.sesion.login(username, password)
 
             if response.status_code == 200:
                 data = response.json()
-                with open(self.COOKIE_FILE, "wb") as f:
-                    pickle.dump(self.session.cookies, f)
-
                 QMessageBox.information(self, "Éxito", data.get("message", "Sesión iniciada"))
                 self.verificar_sesion()
             else:
@@ -288,24 +360,52 @@ class MiInterfaz(QWidget):
         except requests.exceptions.RequestException as e:
             QMessageBox.critical(self, "Error de red", f"No se pudo conectar al servidor:\n{e}")
 
-    def verificar_sesion(self) -> bool:
-        try:
-            resp = self.session.get("https://apidetectorcamreturn.onrender.com/check-auth")
-            logged_in = (resp.status_code == 200)
-        except:
-            logged_in = False
+    def verificar_sesion(self):
+        """Comprueba la sesión en segundo plano: la API puede tardar mucho en responder en frío.
+
+        Si hay datos vigentes en la caché se aplican al momento y la petición
+        solo sirve para revalidarlos.
+        """
+        if self.hilo_verificacion and self.hilo_verificacion.isRunning():
+            return
+        data = self.sesion.datos_en_cache()
+        if data is not None:
+            print("⚡ Sesión recuperada de la caché, revalidando en segundo plano")
+            self.sesion_verificada(data)
+        else:
+            for w in (
+                    self.input_usuario_login,
+                    self.input_password_login,
+                    self.boton_login,
+                    self.boton_register
+            ):
+                w.hide()
+            self.label_usuario.setText("Comprobando sesión...")
+            self.label_usuario.show()
+            self.datos_sesion = None
+        self.hilo_verificacion = HiloVerificacion(self.sesion)
+        self.hilo_verificacion.completado.connect(self.sesion_verificada)
+        self.hilo_verificacion.start()
+
+    def sesion_verificada(self, data) -> bool:
+        if self.medidor_arranque:
+            self.medidor_arranque.marcar("sesión verificada")
+        logged_in = data is not None
+        if data is not None and data == self.datos_sesion:
+            # La revalidación confirma lo que ya se aplicó desde la caché
+            return True
+        self.datos_sesion = data
+        if not logged_in and self.streaming_activo:
+            self.detener_streaming()
 
         if logged_in:
-            data = resp.json()
             if data.get("tipo") != "cliente":
                 QMessageBox.warning(self, "Acceso denegado",
                                     "Solo los usuarios tipo 'cliente' pueden usar esta aplicación.")
                 self.cerrar_sesion()
                 return False
 
-            self.ip_servidor = data.get("ip_servidor")
-            self.puerto_servidor = data.get("puerto_servidor")
-            self.url_publica = data.get("url_publica_servidor") or data.get("url_publica")
+            self.ip_servidor, self.puerto_servidor, self.url_publica = datos_servidor(data)
             print(f"💻 IP del servidor: {self.ip_servidor}")
             print(f"🔌 Puerto del servidor: {self.puerto_servidor}")
             print(f"🌐 URL Pública: {self.url_publica}")
@@ -337,15 +437,10 @@ class MiInterfaz(QWidget):
         return logged_in
 
     def cerrar_sesion(self):
-        try:
-            self.session.post("https://apidetectorcamreturn.onrender.com/logout")
-        except Exception:
-            pass
-
         self.detener_streaming()
-
-        if os.path.exists(self.COOKIE_FILE):
-            os.remove(self.COOKIE_FILE)
+        self.buffers_repeticion = {}
+        self.sesion.logout()
+        self.datos_sesion = None
 
         for w in (
                 self.input_usuario_login,
@@ -371,103 +466,121 @@ class MiInterfaz(QWidget):
             self.detener_streaming()
 
     def activar_streaming(self):
-        base_url = self.url_publica if self.url_publica else f"http://{self.ip_servidor}:{self.puerto_servidor}"
-
-        url_activar = f"{base_url}/activar-camara"
-        url_camaras = f"{base_url}/listar-camaras"
-
-        try:
-            self.boton_camara_remota.setText("Conectando...")
-            self.label_video.setText("Activando cámaras...")
-            self.label_video.setStyleSheet("color: #333333; font-size: 16px; background: transparent;")
-            QApplication.processEvents()
-
-            print("📡 Enviando petición para activar cámaras...")
-            response = requests.get(url_activar, timeout=20)
-            print(f"📨 Respuesta activar: {response.status_code}")
-
-            if response.status_code != 200:
-                error_msg = f"No se pudo activar las cámaras: {response.status_code}"
-                print(f"❌ {error_msg}")
-                QMessageBox.warning(self, "Error", error_msg)
-                self.boton_camara_remota.setText("Activar Cámaras")
-                self.label_video.clear()
+        if self.hilo_activacion and self.hilo_activacion.isRunning():
+            if not self.hilo_activacion.revalidando:
+                # Activación en marcha: el botón ya indica "Conectando..."
                 return
+            # Solo quedaba revalidar la lista de una activación anterior: se empieza de nuevo
+            self.cancelar_activacion()
+        base_url = url_base_servidor(self.ip_servidor, self.puerto_servidor, self.url_publica)
+
+        self.boton_camara_remota.setText("Conectando...")
+        self.boton_camara_remota.setEnabled(False)
+        self.label_video.setStyleSheet("color: #333333; font-size: 16px; background: transparent;")
+
+        from ClienteControl import HiloActivacion
+        self.hilo_activacion = HiloActivacion(base_url, self.cache)
+        self.hilo_activacion.progreso.connect(self.label_video.setText)
+        self.hilo_activacion.completado.connect(self.activacion_completada)
+        self.hilo_activacion.lista_actualizada.connect(self.lista_camaras_actualizada)
+        self.hilo_activacion.fallo.connect(self.activacion_fallida)
+        self.hilo_activacion.start()
+
+    def cancelar_activacion(self):
+        """Desconecta y cancela la activación en curso; se guarda la referencia hasta que termine"""
+        hilo, self.hilo_activacion = self.hilo_activacion, None
+        if not hilo or not hilo.isRunning():
+            return
+        for senal in (hilo.progreso, hilo.completado, hilo.lista_actualizada, hilo.fallo):
+            try:
+                senal.disconnect()
+            except:
+                pass
+        hilo.cancelar()
+        self.hilos_cancelados.append(hilo)
+        hilo.finished.connect(lambda: self.hilos_cancelados.remove(hilo))
+
+    def activacion_completada(self, data):
+        self.boton_camara_remota.setEnabled(True)
+        self.camaras_disponibles = data.get("camaras", [])
+        print(f"📹 Cámaras disponibles: {self.camaras_disponibles}")
+
+        if not self.camaras_disponibles:
+            self.label_video.setText("El sistema no detecta ninguna cámara")
+            self.label_video.setStyleSheet(
+                "color: #ff6b6b; font-size: 18px; font-weight: bold; background: transparent;")
+            self.boton_camara_remota.setText("Activar Cámaras")
+            return
 
-            self.label_video.setText("Obteniendo lista de cámaras...")
-            QApplication.processEvents()
-            import time
-            time.sleep(1)
-
-            print("📡 Solicitando lista de cámaras...")
-            response_camaras = requests.get(url_camaras, timeout=5)
-            print(f"📨 Respuesta lista cámaras: {response_camaras.status_code}")
-
-            if response_camaras.status_code == 200:
-                data = response_camaras.json()
-                print(f"📋 Datos recibidos: {data}")
-
-                self.camaras_disponibles = data.get("camaras", [])
-                print(f"📹 Cámaras disponibles: {self.camaras_disponibles}")
-
-                if not self.camaras_disponibles:
-                    self.label_video.setText("El sistema no detecta ninguna cámara")
-                    self.label_video.setStyleSheet(
-                        "color: #ff6b6b; font-size: 18px; font-weight: bold; background: transparent;")
-                    self.boton_camara_remota.setText("Activar Cámaras")
-                    return
-
-                camara_activa = data.get("camara_activa", False)
-                print(f"🟢 Estado cámaras activas: {camara_activa}")
+        camara_activa = data.get("camara_activa", False)
+        print(f"🟢 Estado cámaras activas: {camara_activa}")
 
-                if not camara_activa:
-                    QMessageBox.warning(self, "Advertencia", "Las cámaras no están activas en el servidor")
-                    self.boton_camara_remota.setText("Activar Cámaras")
-                    self.label_video.clear()
-                    return
+        if not camara_activa:
+            QMessageBox.warning(self, "Advertencia", "Las cámaras no están activas en el servidor")
+            self.boton_camara_remota.setText("Activar Cámaras")
+            self.label_video.clear()
+            return
 
-                self.label_video.setText("Iniciando transmisión...")
-                QApplication.processEvents()
+        self.label_video.setText("Iniciando transmisión...")
 
-                self.camara_actual = 0
-                self.iniciar_video_stream()
-                self.streaming_activo = True
-                self.boton_camara_remota.setText("Desactivar")
-                self.mostrar_controles_navegacion()
+        self.camara_actual = 0
+        self.iniciar_video_stream()
+        self.streaming_activo = True
+        self.boton_camara_remota.setText("Desactivar")
+        self.mostrar_controles_navegacion()
+
+    def lista_camaras_actualizada(self, data):
+        """La lista revalidada no coincide con la de la caché que se usó al activar"""
+        camaras = data.get("camaras", [])
+        print(f"🔄 Lista de cámaras actualizada: {camaras}")
+        if not self.streaming_activo or not camaras:
+            return
+        self.camaras_disponibles = camaras
+        reiniciar = self.vista_mosaico is not None or self.camara_actual >= len(camaras)
+        if self.vista_mosaico:
+            self.cerrar_mosaico()
+        if self.camara_actual >= len(camaras):
+            self.camara_actual = 0
+        if reiniciar:
+            self.iniciar_video_stream()
+        self.ocultar_controles_navegacion()
+        self.mostrar_controles_navegacion()
 
-            else:
-                error_msg = f"No se pudo obtener la lista de cámaras: {response_camaras.status_code}"
-                print(f"❌ {error_msg}")
-                QMessageBox.warning(self, "Error", error_msg)
-                self.boton_camara_remota.setText("Activar Cámaras")
-
-        except requests.exceptions.Timeout:
-            error_msg = "Tiempo de espera agotado al conectar con el servidor"
-            print(f"⏰ {error_msg}")
-            QMessageBox.critical(self, "Error de conexión", error_msg)
-            self.boton_camara_remota.setText("Activar Cámaras")
-            self.label_video.clear()
-        except requests.exceptions.ConnectionError:
-            error_msg = "No se pudo conectar con el servidor de cámaras"
-            print(f"🔌 {error_msg}")
-            QMessageBox.critical(self, "Error de conexión", error_msg)
-            self.boton_camara_remota.setText("Activar Cámaras")
-            self.label_video.clear()
-        except Exception as e:
-            error_msg = f"Error inesperado: {str(e)}"
-            print(f"💥 {error_msg}")
-            QMessageBox.critical(self, "Error", error_msg)
-            self.boton_camara_remota.setText("Activar Cámaras")
-            self.label_video.clear()
+    def activacion_fallida(self, titulo, error_msg):
+        self.boton_camara_remota.setEnabled(True)
+        if self.streaming_activo:
+            # Se activó con la lista en caché y falló la revalidación: los streams siguen reintentando
+            print(f"⚠️ {titulo}: {error_msg}")
+            return
+        # Puede que el servidor de cámaras haya cambiado: se vuelve a preguntar a la API
+        self.sesion.invalidar_cache()
+        self.verificar_sesion()
+        QMessageBox.critical(self, titulo, error_msg)
+        self.boton_camara_remota.setText("Activar Cámaras")
+        self.label_video.clear()
 
-    def detener_streaming(self):
+    def detener_video_thread(self):
         if self.video_thread:
             try:
-                self.video_thread.frame_received.disconnect()
+                self.video_thread.frame_disponible.disconnect()
             except:
                 pass
             self.video_thread.stop()
+            print(f"📉 Frames descartados: {self.video_thread.frames_descartados}, "
+                  f"repetidos sin decodificar: {self.video_thread.metricas.frames_repetidos}")
             self.video_thread = None
+            if self.buffer_jitter:
+                print(f"🎚️ Buffer de jitter: {self.buffer_jitter.underruns} underruns, "
+                      f"{self.buffer_jitter.descartados} frames descartados")
+                self.buffer_jitter.vaciar()
+
+    def detener_streaming(self):
+        # La revalidación de la lista en caché ya no sirve de nada
+        self.cancelar_activacion()
+        self.detener_video_thread()
+        self.detener_reservas()
+        if self.vista_mosaico:
+            self.cerrar_mosaico()
 
         self.streaming_activo = False
 
@@ -479,60 +592,387 @@ class MiInterfaz(QWidget):
         self.ocultar_controles_navegacion()
 
         if self.ip_servidor and self.puerto_servidor:
-            QTimer.singleShot(100, self.desactivar_servidor_async)
-
-    def desactivar_servidor_async(self):
-        try:
-            url = f"http://{self.ip_servidor}:{self.puerto_servidor}/desactivar-camara"
-            requests.get(url, timeout=2)
-        except Exception:
-            pass
+            from ClienteControl import ClienteControl
+            ClienteControl(f"http://{self.ip_servidor}:{self.puerto_servidor}").desactivar_en_segundo_plano()
 
     def iniciar_video_stream(self):
         """Inicia el stream de video desde la URL pública con la ruta /video/{índice}"""
-        if self.video_thread:
-            print("🛑 Deteniendo stream anterior...")
-            self.video_thread.stop()
-            self.video_thread = None
-
         if not self.url_publica:
             error_msg = "No se tiene URL pública del servidor"
             print(f"❌ {error_msg}")
             self.manejar_error_video(error_msg)
             return
 
-        # ✅ CORREGIDO: Usar la ruta correcta del stream
-        url = f"{self.url_publica}/video/{self.camara_actual}"
-
-        print(f"🎥 Iniciando stream desde: {url}")
-
-        # Crear y iniciar el thread de video
-        self.video_thread = VideoThread(url)
-        self.video_thread.frame_received.connect(self.mostrar_frame)
+        from VideoThread import VideoThread
+        if self.medidor_arranque:
+            self.medidor_arranque.marcar("módulos de video cargados")
+        if self.video_thread:
+            self.pasar_a_reserva(self.camara_video, self.video_thread)
+            self.video_thread = None
+        if self.buffer_jitter:
+            # Lo encolado es de la cámara anterior
+            self.buffer_jitter.vaciar()
+
+        hilo = self.hilos_reserva.pop(self.camara_actual, None)
+        if hilo and hilo.isRunning():
+            # La conexión ya está abierta: se muestra su último JPEG al instante
+            print(f"⚡ Usando conexión en reserva de la cámara {self.camara_actual + 1}")
+            self.video_thread = hilo
+            self.conectar_video_thread()
+            self.video_thread.limite_inactividad = None
+            self.video_thread.reconectar = True
+            self.video_thread.set_activo(self.en_pantalla)
+        else:
+            if hilo:
+                hilo.stop()
+            # ✅ CORREGIDO: Usar la ruta correcta del stream
+            url = f"{self.url_publica}/video/{self.camara_actual}"
+
+            print(f"🎥 Iniciando stream desde: {url}")
+
+            # Crear y iniciar el thread de video
+            self.video_thread = VideoThread(url, activo=self.en_pantalla, reconectar=True,
+                                            motor=self.motor())
+            self.video_thread.agregar_receptor(self.buffer_repeticion(self.camara_actual).agregar)
+            self.conectar_video_thread()
+            self.video_thread.start()
+            print("✅ Thread de video iniciado")
+
+        self.camara_video = self.camara_actual
+        self.actualizar_reservas()
+
+    def conectar_video_thread(self):
+        from DetectorMovimiento import DetectorMovimiento
+        self.video_thread.set_tamano_destino(self.label_video.width(), self.label_video.height())
+        # Con buffer de jitter el hilo entrega cada frame de una ráfaga, no solo el último
+        self.video_thread.set_cola(self.buffer_jitter.profundidad() if self.buffer_jitter else 0)
+        self.video_thread.frame_disponible.connect(self.mostrar_frame)
         self.video_thread.error_occurred.connect(self.manejar_error_video)
-        self.video_thread.start()
-        print("✅ Thread de video iniciado")
-
-    def mostrar_frame(self, frame):
-        if not self.streaming_activo:
+        self.video_thread.reconectando.connect(self.mostrar_reconexion)
+        self.video_thread.reconectado.connect(self.mostrar_info_camara)
+        self.video_thread.movimiento_detectado.connect(self.mostrar_movimiento)
+        self.video_thread.set_detector(DetectorMovimiento.desde_entorno() if self.deteccion_movimiento else None)
+        self.hay_movimiento = False
+
+    def pasar_a_reserva(self, indice, hilo):
+        """Deja el stream abierto sin decodificar, listo para volver a mostrarse al instante"""
+        try:
+            hilo.frame_disponible.disconnect()
+            hilo.error_occurred.disconnect()
+            hilo.reconectando.disconnect()
+            hilo.reconectado.disconnect()
+            hilo.movimiento_detectado.disconnect()
+        except:
+            pass
+        hilo.limite_inactividad = self.TIEMPO_RESERVA
+        hilo.reconectar = False
+        hilo.set_detector(None)
+        hilo.set_cola(0)
+        hilo.set_activo(False)
+        hilo.vaciar_buzon()
+        self.hilos_reserva[indice] = hilo
+
+    def actualizar_reservas(self):
+        """Mantiene en reserva las conexiones de las cámaras vecinas a la actual"""
+        n = len(self.camaras_disponibles)
+        vecinas = set()
+        if n > 1:
+            vecinas = {(self.camara_actual - 1) % n, (self.camara_actual + 1) % n}
+
+        for indice, hilo in list(self.hilos_reserva.items()):
+            if indice not in vecinas or not hilo.isRunning():
+                del self.hilos_reserva[indice]
+                hilo.stop()
+
+        from VideoThread import VideoThread
+        for indice in vecinas - set(self.hilos_reserva):
+            hilo = VideoThread(f"{self.url_publica}/video/{indice}", activo=False,
+                               limite_inactividad=self.TIEMPO_RESERVA, motor=self.motor())
+            hilo.agregar_receptor(self.buffer_repeticion(indice).agregar)
+            hilo.set_tamano_destino(self.label_video.width(), self.label_video.height())
+            hilo.start()
+            self.hilos_reserva[indice] = hilo
+
+    def detener_reservas(self):
+        for hilo in self.hilos_reserva.values():
+            hilo.stop()
+        self.hilos_reserva = {}
+
+    def motor(self):
+        if not self._motor_creado:
+            from MotorDecodificacion import MotorDecodificacion
+            self.motor_decodificacion = MotorDecodificacion.desde_entorno()
+            self._motor_creado = True
+        return self.motor_decodificacion
+
+    def reactor(self):
+        if not self._reactor_creado:
+            from ReactorStreams import ReactorStreams
+            self.reactor_streams = ReactorStreams.desde_entorno()
+            self._reactor_creado = True
+        return self.reactor_streams
+
+    def mostrar_frame(self):
+        if not self.streaming_activo or not self.video_thread:
             return
+        frame = self.video_thread.buzon.tomar()
+        if frame is None:
+            return
+        if self.buffer_jitter:
+            self.buffer_jitter.agregar(frame)
+        else:
+            self.presentar_frame(frame)
+
+    def presentar_frame(self, frame):
+        from VideoThread import liberar_frame
         try:
-            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            height, width, channel = rgb_frame.shape
-            bytes_per_line = 3 * width
-            q_image = QImage(rgb_frame.data, width, height, bytes_per_line, QImage.Format.Format_RGB888)
-            pixmap = QPixmap.fromImage(q_image)
-            scaled_pixmap = pixmap.scaled(
-                self.label_video.size(),
-                Qt.AspectRatioMode.KeepAspectRatioByExpanding,
-                Qt.TransformationMode.SmoothTransformation
-            )
-            self.label_video.setPixmap(scaled_pixmap)
+            if not self.streaming_activo or not self.video_thread:
+                return
+            # El hilo de video ya entrega RGB al tamaño del label: aquí solo se copia y se pinta
+            self.label_video.mostrar_imagen(frame.imagen)
+            self.video_thread.metricas.registrar_mostrado(frame.llegada)
+            if self.medidor_arranque:
+                self.medidor_arranque.marcar("primer frame")
         except Exception as e:
             print(f"Error al mostrar frame: {e}")
             if self.streaming_activo:
                 self.label_video.setText(f"Error al procesar imagen: {e}")
                 self.label_video.setStyleSheet("color: #ff6b6b; font-size: 16px; background: transparent;")
+        finally:
+            liberar_frame(frame)
+
+    def descartar_frame(self, frame):
+        from VideoThread import liberar_frame
+        liberar_frame(frame)
+
+    def alternar_overlay_metricas(self):
+        """F3: muestra u oculta las métricas de rendimiento sobre el video"""
+        if self.label_metricas.isVisible():
+            self.label_metricas.hide()
+            if not self.volcado_metricas:
+                self.timer_metricas.stop()
+        else:
+            self.label_metricas.setText("Recogiendo métricas...")
+            self.label_metricas.adjustSize()
+            self.label_metricas.show()
+            self.label_metricas.raise_()
+            self.timer_metricas.start()
+
+    def actualizar_metricas(self):
+        instantaneas = []
+        if self.video_thread:
+            instantaneas.append(self.video_thread.instantanea_metricas())
+        if self.vista_mosaico:
+            instantaneas.extend(self.vista_mosaico.instantaneas_metricas())
+
+        if self.label_metricas.isVisible():
+            texto = "\n\n".join(texto_metricas(datos) for datos in instantaneas)
+            self.label_metricas.setText(texto or "Sin streams activos")
+            self.label_metricas.adjustSize()
+            self.label_metricas.raise_()
+        if self.volcado_metricas:
+            try:
+                self.volcado_metricas.escribir(instantaneas)
+            except OSError as e:
+                print(f"❌ No se pudieron guardar las métricas: {e}")
+
+    def eventFilter(self, obj, event):
+        if obj is self.label_video and event.type() == QEvent.Type.Resize:
+            for hilo in [self.video_thread, *self.hilos_reserva.values()]:
+                if hilo:
+                    hilo.set_tamano_destino(event.size().width(), event.size().height())
+        elif obj is self.windowHandle() and event.type() == QEvent.Type.Expose:
+            # El sistema deja de exponer la ventana cuando queda tapada por completo
+            QTimer.singleShot(0, self.actualizar_visibilidad)
+        return super().eventFilter(obj, event)
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if self.medidor_arranque:
+            self.medidor_arranque.marcar("primer pintado")
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if self.windowHandle():
+            self.windowHandle().removeEventFilter(self)
+            self.windowHandle().installEventFilter(self)
+        self.actualizar_visibilidad()
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self.actualizar_visibilidad()
+
+    def changeEvent(self, event):
+        super().changeEvent(event)
+        if event.type() == QEvent.Type.WindowStateChange:
+            self.actualizar_visibilidad()
+
+    def actualizar_visibilidad(self):
+        """Pausa la decodificación mientras no se ve la ventana y la reanuda con el último JPEG"""
+        ventana = self.windowHandle()
+        en_pantalla = (self.isVisible() and not self.isMinimized()
+                       and (ventana is None or ventana.isExposed()))
+        if en_pantalla == self.en_pantalla:
+            return
+        self.en_pantalla = en_pantalla
+        print("▶️ Ventana visible: se reanuda la decodificación" if en_pantalla
+              else "⏸️ Ventana fuera de pantalla: solo se mantiene la conexión")
+        if self.video_thread:
+            self.video_thread.set_activo(en_pantalla)
+        if self.vista_mosaico:
+            self.vista_mosaico.set_en_pantalla(en_pantalla)
+
+    def alternar_mosaico(self):
+        if self.vista_mosaico:
+            self.cerrar_mosaico()
+            self.iniciar_video_stream()
+            self.mostrar_controles_navegacion()
+        else:
+            self.abrir_mosaico()
+
+    def abrir_mosaico(self):
+        """Sustituye la vista individual por el mosaico con todas las cámaras"""
+        if not self.url_publica:
+            self.manejar_error_video("No se tiene URL pública del servidor")
+            return
+        from VistaMosaico import VistaMosaico
+        self.detener_video_thread()
+        self.detener_reservas()
+        self.label_video.hide()
+        self.boton_anterior.hide()
+        self.boton_siguiente.hide()
+
+        self.vista_mosaico = VistaMosaico(self.url_publica, len(self.camaras_disponibles),
+                                          buffer_de_camara=self.buffer_repeticion, motor=self.motor(),
+                                          reactor=self.reactor())
+        self.vista_mosaico.camara_ampliada.connect(self.seleccionar_camara_mosaico)
+        self.vista_mosaico.set_deteccion_movimiento(self.deteccion_movimiento)
+        self.vista_mosaico.set_en_pantalla(self.en_pantalla)
+        self.layout_area_principal.insertWidget(0, self.vista_mosaico)
+        self.vista_mosaico.iniciar()
+
+        self.label_camara_info.setText(f"Mosaico: {len(self.camaras_disponibles)} cámaras")
+        self.boton_mosaico.setText("Individual")
+        print(f"🧩 Mosaico iniciado con {len(self.camaras_disponibles)} cámaras")
+
+    def cerrar_mosaico(self):
+        self.vista_mosaico.detener()
+        self.layout_area_principal.removeWidget(self.vista_mosaico)
+        self.vista_mosaico.deleteLater()
+        self.vista_mosaico = None
+        self.label_video.show()
+        self.boton_mosaico.setText("Mosaico")
+
+    def seleccionar_camara_mosaico(self, indice):
+        self.camara_actual = indice
+        self.label_camara_info.setText(f"Cámara {self.camara_actual + 1} de {len(self.camaras_disponibles)}")
+
+    def mostrar_reconexion(self, intento, espera):
+        # El último frame se queda en pantalla; solo se avisa en la barra de controles
+        self.label_camara_info.setText(f"Reconectando cámara {self.camara_actual + 1}... (intento {intento})")
+
+    def mostrar_info_camara(self, reconexiones=None, tiempo_caido=None):
+        """Cámara actual y, si se ha caído alguna vez, cuántas veces se reconectó y cuánto tiempo estuvo sin imagen"""
+        texto = f"Cámara {self.camara_actual + 1} de {len(self.camaras_disponibles)}"
+        if reconexiones is None and self.video_thread:
+            reconexiones, tiempo_caido = self.video_thread.reconexiones, self.video_thread.tiempo_caido
+        if reconexiones:
+            texto += f" · {reconexiones} reconexi{'ón' if reconexiones == 1 else 'ones'}, {tiempo_caido:.1f}s sin imagen"
+        self.label_camara_info.setText(texto)
+
+    def alternar_deteccion_movimiento(self, activa):
+        """Detección de movimiento en el cliente, configurable con DETECTORCAM_MOVIMIENTO_*"""
+        from DetectorMovimiento import DetectorMovimiento
+        self.deteccion_movimiento = activa
+        if self.video_thread:
+            self.video_thread.set_detector(DetectorMovimiento.desde_entorno() if activa else None)
+        if self.vista_mosaico:
+            self.vista_mosaico.set_deteccion_movimiento(activa)
+        if not activa and self.hay_movimiento:
+            self.mostrar_movimiento([])
+        print(f"🏃 Detección de movimiento {'activada' if activa else 'desactivada'}")
+
+    def mostrar_movimiento(self, cajas):
+        hay_movimiento = bool(cajas)
+        if hay_movimiento == self.hay_movimiento:
+            return
+        self.hay_movimiento = hay_movimiento
+        if hay_movimiento:
+            print(f"🔴 Movimiento en cámara {self.camara_actual + 1}: {len(cajas)} zona(s)")
+            self.label_camara_info.setText(f"🔴 Movimiento - Cámara {self.camara_actual + 1} de {len(self.camaras_disponibles)}")
+        else:
+            self.mostrar_info_camara()
+
+    def buffer_repeticion(self, indice):
+        """Buffer de repetición de la cámara, compartido por todos los streams que la muestran"""
+        if indice not in self.buffers_repeticion:
+            self.buffers_repeticion[indice] = BufferRepeticion(*self.limites_repeticion)
+        return self.buffers_repeticion[indice]
+
+    def abrir_repeticion(self):
+        """Abre la repetición de los últimos segundos de la cámara actual"""
+        buffer = self.buffers_repeticion.get(self.camara_actual)
+        if not buffer or not len(buffer):
+            QMessageBox.information(self, "Repetición", "Todavía no hay video para repetir.")
+            return
+        from VentanaReproduccion import VentanaReproduccion
+        fuente = buffer.instantanea()
+        print(f"⏪ Repetición cámara {self.camara_actual + 1}: {len(fuente)} frames, "
+              f"{(fuente.fin_ms - fuente.inicio_ms) / 1000:.0f}s, {buffer.bytes / 1e6:.1f} MB")
+        ventana = VentanaReproduccion(fuente, f"Repetición - Cámara {self.camara_actual + 1}")
+        ventana.ir_a(fuente.indice_en(fuente.fin_ms - self.SEGUNDOS_RETROCESO * 1000))
+        self.mostrar_reproduccion(ventana)
+
+    def capturar_camara_actual(self):
+        """Guarda el último JPEG recibido de la cámara actual, a resolución completa"""
+        self.guardar_capturas([self.camara_actual])
+
+    def capturar_todas(self):
+        self.guardar_capturas(range(len(self.camaras_disponibles)))
+
+    def guardar_capturas(self, indices):
+        from Captura import EDAD_MAXIMA_CAPTURA
+        ahora_ms = time.time() * 1000
+        capturas = []
+        omitidas = []  # (índice, motivo) de las cámaras que no se pueden capturar ahora
+        for indice in indices:
+            buffer = self.buffers_repeticion.get(indice)
+            ultimo = buffer.ultimo() if buffer else None
+            if not ultimo:
+                omitidas.append((indice, "sin imagen recibida"))
+            elif ahora_ms - ultimo[0] > EDAD_MAXIMA_CAPTURA * 1000:
+                # Sin stream abierto el buffer conserva un JPEG viejo: no es una captura de ahora
+                omitidas.append((indice, f"última imagen de hace {(ahora_ms - ultimo[0]) / 1000:.0f}s"))
+            else:
+                capturas.append((indice, *ultimo))
+        for indice, motivo in omitidas:
+            print(f"⚠️ Cámara {indice + 1} sin capturar: {motivo}")
+        if omitidas and not self.vista_mosaico and len(indices) > 1:
+            print("ℹ️ En la vista individual solo se reciben la cámara actual y sus vecinas: "
+                  "el mosaico permite capturarlas todas")
+        if not capturas:
+            texto = "Todavía no se ha recibido imagen de la cámara."
+            if len(omitidas) > 1:
+                texto = "No hay imagen reciente de ninguna cámara:\n" + "\n".join(
+                    f"Cámara {indice + 1}: {motivo}" for indice, motivo in omitidas)
+            QMessageBox.information(self, "Captura", texto)
+            return
+
+        from Captura import HiloCapturas, DIRECTORIO_CAPTURAS
+        hilo = HiloCapturas(os.environ.get("DETECTORCAM_CAPTURAS", DIRECTORIO_CAPTURAS), capturas)
+        hilo.completado.connect(lambda rutas: self.capturas_guardadas(rutas, omitidas))
+        hilo.fallo.connect(lambda error: QMessageBox.warning(self, "Captura", f"No se pudo guardar: {error}"))
+        hilo.finished.connect(lambda: self.hilos_captura.remove(hilo))
+        self.hilos_captura.append(hilo)
+        hilo.start()
+
+    def capturas_guardadas(self, rutas, omitidas=()):
+        if rutas:
+            texto = rutas[0] if len(rutas) == 1 else f"{len(rutas)} capturas en {os.path.dirname(rutas[0])}"
+            if omitidas:
+                camaras = ", ".join(str(indice + 1) for indice, _ in omitidas)
+                texto += f" · sin capturar: cámara{'s' if len(omitidas) > 1 else ''} {camaras} (sin imagen reciente)"
+            self.label_camara_info.setText(f"📸 {texto}")
 
     def manejar_error_video(self, error_msg):
         self.label_video.setText(f"Error: {error_msg}")
@@ -542,12 +982,22 @@ class MiInterfaz(QWidget):
         if len(self.camaras_disponibles) > 1:
             self.boton_anterior.show()
             self.boton_siguiente.show()
+            self.boton_mosaico.show()
+            self.boton_captura_todas.show()
         self.label_camara_info.setText(f"Cámara {self.camara_actual + 1} de {len(self.camaras_disponibles)}")
         self.label_camara_info.show()
+        self.boton_repeticion.show()
+        self.boton_captura.show()
+        self.boton_movimiento.show()
 
     def ocultar_controles_navegacion(self):
         self.boton_anterior.hide()
         self.boton_siguiente.hide()
+        self.boton_mosaico.hide()
+        self.boton_repeticion.hide()
+        self.boton_captura.hide()
+        self.boton_captura_todas.hide()
+        self.boton_movimiento.hide()
         self.label_camara_info.hide()
 
     def camara_anterior(self):
@@ -563,11 +1013,44 @@ class MiInterfaz(QWidget):
             self.label_camara_info.setText(f"Cámara {self.camara_actual + 1} de {len(self.camaras_disponibles)}")
 
     def closeEvent(self, event):
+        # Lo que queda son esperas: la ventana desaparece ya en lugar de quedarse congelada
+        self.hide()
+        self.cancelar_activacion()
         self.detener_streaming()
+        # Cancelada: como mucho termina la petición HTTP en curso. Si la red la
+        # retiene más, se sale igualmente: las listas conservan la referencia al
+        # hilo, así Qt no lo destruye en marcha
+        for hilo in list(self.hilos_cancelados):
+            hilo.wait(self.ESPERA_CIERRE_MS)
+        for hilo in self.hilos_captura:
+            # Solo escriben unos pocos JPEG
+            hilo.wait(self.ESPERA_CIERRE_MS)
+        if "VideoThread" in sys.modules:
+            # Los sockets ya están cortados: los hilos terminan enseguida
+            from VideoThread import esperar_detenidos
+            esperar_detenidos()
+        if self.hilo_verificacion and self.hilo_verificacion.isRunning():
+            self.hilo_verificacion.completado.disconnect()
+            # check-auth puede tardar hasta TIMEOUT_API con la API en frío
+            self.hilo_verificacion.wait(self.ESPERA_CIERRE_MS)
+        if self.reactor_streams:
+            self.reactor_streams.cerrar()
+            self.reactor_streams = None
+        if self.motor_decodificacion:
+            self.motor_decodificacion.cerrar()
+            self.motor_decodificacion = None
         event.accept()
 
 
 if __name__ == "__main__":
+    # El motor de decodificación usa procesos "spawn": en el ejecutable congelado
+    # de Windows cada trabajador arranca este mismo programa y debe parar aquí
+    import multiprocessing
+    multiprocessing.freeze_support()
+    if len(sys.argv) > 1 and sys.argv[1] == "grabar":
+        from Grabador import main_grabacion
+        sys.exit(main_grabacion(sys.argv[2:]))
+
     app = QApplication(sys.argv)
     ventana = MiInterfaz()
     ventana.show()
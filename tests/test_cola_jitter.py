@@ -0,0 +1,75 @@
+# test_cola_jitter.py
+import statistics
+import time
+
+import pytest
+from PyQt6.QtCore import QCoreApplication, QTimer
+
+from BufferJitter import BufferJitter
+from ServidorPrueba import ServidorPrueba
+from VideoThread import VideoThread, liberar_frame
+
+FPS = 25
+RAFAGA = 4
+DURACION_MS = 4000
+CALENTAMIENTO = 2.0  # segundos hasta que el buffer ha medido la cadencia y hecho colchón
+
+
+@pytest.fixture(scope="module")
+def app():
+    return QCoreApplication.instance() or QCoreApplication([])
+
+
+@pytest.fixture
+def servidor():
+    servidor = ServidorPrueba(camaras=1, ancho=160, alto=120, fps=FPS, rafaga=RAFAGA).iniciar()
+    yield servidor
+    servidor.detener()
+
+
+def reproducir(app, url, profundidad):
+    """Instantes en que el BufferJitter presenta cada frame del stream durante DURACION_MS"""
+    presentados = []
+
+    def presentar(frame):
+        presentados.append(time.monotonic())
+        liberar_frame(frame)
+
+    buffer = BufferJitter(presentar, liberar_frame, maximo_ms=400)
+    hilo = VideoThread(url, reconectar=False)
+    hilo.set_cola(buffer.profundidad() if profundidad is None else profundidad)
+
+    def mostrar():
+        frame = hilo.buzon.tomar()
+        if frame is not None:
+            buffer.agregar(frame)
+
+    hilo.frame_disponible.connect(mostrar)
+    hilo.start()
+    QTimer.singleShot(DURACION_MS, app.quit)
+    app.exec()
+    hilo.stop()
+    hilo.wait(2000)
+    buffer.vaciar()
+    return presentados, hilo
+
+
+def test_rafagas_salen_espaciadas(app, servidor):
+    presentados, hilo = reproducir(app, servidor.url + "/video/0", None)
+    inicio = presentados[0] + CALENTAMIENTO
+    intervalos = [b - a for a, b in zip(presentados, presentados[1:]) if a >= inicio]
+    esperados = (DURACION_MS / 1000 - CALENTAMIENTO) * FPS
+    # Llegan todos los frames de cada ráfaga, no solo el último
+    assert len(intervalos) >= 0.8 * esperados
+    assert hilo.frames_sin_decodificar == 0
+    # ... y se presentan a la cadencia media, no de cuatro en cuatro
+    mediana = statistics.median(intervalos)
+    assert mediana == pytest.approx(1 / FPS, rel=0.25)
+    cerca = sum(1 for d in intervalos if abs(d - mediana) < 0.5 / FPS)
+    assert cerca >= 0.8 * len(intervalos)
+
+
+def test_sin_cola_solo_el_ultimo_de_cada_rafaga(app, servidor):
+    presentados, hilo = reproducir(app, servidor.url + "/video/0", 0)
+    assert hilo.frames_sin_decodificar > 0
+    assert len(presentados) < 0.6 * DURACION_MS / 1000 * FPS
@@ -0,0 +1,105 @@
+# test_decodificador_chunked.py
+import random
+
+import pytest
+
+from ParserMJPEG import DecodificadorChunked
+
+
+def codificar(trozos, extension=b""):
+    """Cuerpo chunked con los trozos dados más el chunk final de tamaño 0"""
+    cuerpo = b"".join(b"%x%s\r\n%s\r\n" % (len(t), extension, t) for t in trozos)
+    return cuerpo + b"0\r\n\r\n"
+
+
+def alimentar(decodificador, datos, cortes):
+    """Alimenta `datos` partidos por las posiciones de `cortes` y junta el payload"""
+    payload = bytearray()
+    inicio = 0
+    for fin in list(cortes) + [len(datos)]:
+        for trozo in decodificador.alimentar(datos[inicio:fin]):
+            payload += trozo
+        inicio = fin
+    return bytes(payload)
+
+
+TROZOS = [b"--frame\r\n", bytes(range(256)) * 40, b"\r\n\r\n", b"x", b"\xff\xd8" + b"\0" * 5000 + b"\xff\xd9"]
+
+
+def test_datos_completos_de_una_vez():
+    decodificador = DecodificadorChunked()
+    assert alimentar(decodificador, codificar(TROZOS), []) == b"".join(TROZOS)
+    assert decodificador.terminado
+
+
+def test_byte_a_byte():
+    datos = codificar(TROZOS)
+    decodificador = DecodificadorChunked()
+    assert alimentar(decodificador, datos, range(1, len(datos))) == b"".join(TROZOS)
+    assert decodificador.terminado
+
+
+@pytest.mark.parametrize("semilla", range(20))
+def test_cortes_aleatorios(semilla):
+    aleatorio = random.Random(semilla)
+    datos = codificar(TROZOS)
+    cortes = sorted(aleatorio.sample(range(1, len(datos)), aleatorio.randint(1, 200)))
+    decodificador = DecodificadorChunked()
+    assert alimentar(decodificador, datos, cortes) == b"".join(TROZOS)
+    assert decodificador.terminado
+
+
+def test_cortes_en_cada_frontera_de_la_linea_de_tamano():
+    datos = codificar([b"hola", b"mundo"])
+    for corte in range(1, len(datos)):
+        decodificador = DecodificadorChunked()
+        assert alimentar(decodificador, datos, [corte]) == b"holamundo", corte
+
+
+def test_devuelve_vistas_sin_copiar():
+    datos = bytearray(codificar([b"abcdef"]))
+    trozos = DecodificadorChunked().alimentar(datos)
+    assert all(isinstance(t, memoryview) for t in trozos)
+    datos[datos.index(b"abcdef")] = ord("z")
+    assert bytes(trozos[0]) == b"zbcdef"
+
+
+def test_extensiones_de_chunk():
+    datos = codificar(TROZOS, extension=b';nombre="valor";otra')
+    decodificador = DecodificadorChunked()
+    assert alimentar(decodificador, datos, range(7, len(datos), 7)) == b"".join(TROZOS)
+    assert decodificador.terminado
+
+
+def test_tamano_en_mayusculas_y_con_espacios():
+    datos = b"A \r\n0123456789\r\n0\r\n\r\n"
+    assert alimentar(DecodificadorChunked(), datos, []) == b"0123456789"
+
+
+def test_nada_tras_el_ultimo_chunk():
+    decodificador = DecodificadorChunked()
+    payload = alimentar(decodificador, codificar([b"fin"]) + b"5\r\nsobra\r\n", [])
+    assert payload == b"fin"
+    assert decodificador.terminado
+    assert decodificador.alimentar(b"3\r\nmas\r\n") == []
+
+
+def test_sin_terminar_hasta_el_chunk_final():
+    datos = codificar([b"abc"])
+    decodificador = DecodificadorChunked()
+    alimentar(decodificador, datos[:-5], [])
+    assert not decodificador.terminado
+    decodificador.alimentar(datos[-5:])
+    assert decodificador.terminado
+
+
+def test_linea_de_tamano_demasiado_larga():
+    decodificador = DecodificadorChunked()
+    with pytest.raises(ValueError):
+        for _ in range(100):
+            decodificador.alimentar(b"1" * 64)
+
+
+def test_tamano_no_hexadecimal():
+    with pytest.raises(ValueError):
+        DecodificadorChunked().alimentar(b"zz\r\nhola\r\n")
@@ -0,0 +1,79 @@
+# test_entorno.py
+import math
+
+import pytest
+
+from BufferJitter import BufferJitter
+from Entorno import numero_en_rango, numero_positivo, valor_entorno
+
+VARIABLE = "DETECTORCAM_PRUEBA"
+
+
+@pytest.mark.parametrize("texto, esperado", [("", 7), ("   ", 7), ("3", 3.0), (" 2.5 ", 2.5)])
+def test_valor_entorno(monkeypatch, texto, esperado):
+    monkeypatch.setenv(VARIABLE, texto)
+    assert valor_entorno(VARIABLE, 7) == esperado
+
+
+def test_sin_variable(monkeypatch):
+    monkeypatch.delenv(VARIABLE, raising=False)
+    assert valor_entorno(VARIABLE, 7) == 7
+
+
+@pytest.mark.parametrize("texto", ["abc", "-1", "nan", "inf", "300"])
+def test_fuera_de_rango_usa_el_defecto_y_avisa(monkeypatch, capsys, texto):
+    monkeypatch.setenv(VARIABLE, texto)
+    assert valor_entorno(VARIABLE, 7, numero_en_rango(0, 255)) == 7
+    assert VARIABLE in capsys.readouterr().out
+
+
+def test_entero(monkeypatch):
+    monkeypatch.setenv(VARIABLE, "2.5")
+    assert valor_entorno(VARIABLE, 1, numero_en_rango(1, entero=True)) == 1
+    monkeypatch.setenv(VARIABLE, "4")
+    assert valor_entorno(VARIABLE, 1, numero_en_rango(1, entero=True)) == 4
+
+
+@pytest.mark.parametrize("texto", ["0", "-2", "inf", "nan"])
+def test_numero_positivo(texto):
+    with pytest.raises(ValueError):
+        numero_positivo(texto)
+    assert numero_positivo("0.5") == 0.5
+    assert not math.isinf(numero_en_rango(0)("1e308"))
+
+
+@pytest.mark.parametrize("texto", ["abc", "-5", "0", ""])
+def test_jitter_desactivado(monkeypatch, texto):
+    monkeypatch.setenv("DETECTORCAM_JITTER_MS", texto)
+    assert BufferJitter.desde_entorno(None, None) is None
+
+
+@pytest.mark.parametrize("texto", ["abc", "-1", "1.5", "0"])
+def test_motor_desactivado(monkeypatch, texto):
+    from MotorDecodificacion import MotorDecodificacion
+    monkeypatch.setenv("DETECTORCAM_PROCESOS_DECODIFICACION", texto)
+    assert MotorDecodificacion.desde_entorno() is None
+
+
+@pytest.mark.parametrize("texto, esperado", [("abc", 1.0), ("0", 0.1), ("0.0001", 0.1), ("2", 2.0)])
+def test_periodo_metricas(monkeypatch, texto, esperado):
+    from Metricas import periodo_desde_entorno
+    monkeypatch.setenv("DETECTORCAM_METRICAS_PERIODO", texto)
+    assert periodo_desde_entorno() == esperado
+
+
+@pytest.mark.parametrize("texto, esperado", [
+    ("1", True), ("true", True), ("YES", True), ("on", True), ("sí", True),
+    ("0", False), ("false", False), ("No", False), ("off", False), ("", False), ("quizas", False),
+])
+def test_booleano(monkeypatch, texto, esperado):
+    from Entorno import booleano
+    monkeypatch.setenv(VARIABLE, texto)
+    assert valor_entorno(VARIABLE, False, booleano) is esperado
+
+
+@pytest.mark.parametrize("texto", ["false", "no", "0", "off", "abc"])
+def test_reactor_desactivado(monkeypatch, texto):
+    from ReactorStreams import ReactorStreams
+    monkeypatch.setenv("DETECTORCAM_REACTOR", texto)
+    assert ReactorStreams.desde_entorno() is None
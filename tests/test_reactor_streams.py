@@ -0,0 +1,170 @@
+# test_reactor_streams.py
+import socket
+import threading
+import time
+
+import cv2
+import numpy as np
+import pytest
+
+from ReactorStreams import MAXIMO_CABECERAS, ReactorStreams, StreamReactor
+
+ESPERA = 10.0
+
+
+class ServidorCrudo:
+    """Servidor TCP que responde a cada conexión con unos bytes fijos y la cierra.
+
+    Con `tamano_envio` la respuesta sale en trozos de ese tamaño con una
+    pausa entre ellos, para que el cliente la reciba en lecturas separadas.
+    """
+
+    def __init__(self, respuesta, tamano_envio=None):
+        self.respuesta = respuesta
+        self.tamano_envio = tamano_envio or len(respuesta)
+        self._sock = socket.create_server(("127.0.0.1", 0))
+        self.url = f"http://127.0.0.1:{self._sock.getsockname()[1]}/video/0"
+        self._hilo = threading.Thread(target=self._servir, daemon=True)
+        self._hilo.start()
+
+    def _servir(self):
+        while True:
+            try:
+                conexion, _ = self._sock.accept()
+            except OSError:
+                return
+            with conexion:
+                peticion = b""
+                while b"\r\n\r\n" not in peticion:
+                    datos = conexion.recv(4096)
+                    if not datos:
+                        break
+                    peticion += datos
+                try:
+                    for i in range(0, len(self.respuesta), self.tamano_envio):
+                        if i:
+                            time.sleep(0.001)
+                        conexion.sendall(self.respuesta[i:i + self.tamano_envio])
+                except OSError:
+                    pass
+
+    def detener(self):
+        self._sock.close()
+
+
+class Resultado:
+    """Recoge lo que el reactor entrega al stream, sin depender del bucle de eventos de Qt"""
+
+    def __init__(self, stream):
+        self.frames = []
+        self.error = None
+        self.desconectado = threading.Event()
+        stream.agregar_receptor(lambda jpg, marca_tiempo: self.frames.append(bytes(jpg)))
+        stream._tras_desconexion = self._tras_desconexion
+
+    def _tras_desconexion(self, error_msg):
+        self.error = error_msg
+        self.desconectado.set()
+        return None
+
+
+@pytest.fixture
+def reactor():
+    reactor = ReactorStreams(hilos_decodificacion=1)
+    yield reactor
+    reactor.cerrar()
+
+
+@pytest.fixture
+def servidor():
+    servidores = []
+
+    def crear(respuesta, tamano_envio=None):
+        servidores.append(ServidorCrudo(respuesta, tamano_envio))
+        return servidores[-1]
+
+    yield crear
+    for s in servidores:
+        s.detener()
+
+
+def leer(reactor, url):
+    stream = StreamReactor(reactor, url, activo=False)
+    resultado = Resultado(stream)
+    stream.start()
+    assert resultado.desconectado.wait(ESPERA)
+    stream.stop()
+    return resultado
+
+
+def jpeg(valor):
+    return cv2.imencode(".jpg", np.full((48, 64, 3), valor, np.uint8))[1].tobytes()
+
+
+def multipart(jpegs):
+    return b"".join(b"--frame\r\nContent-Type: image/jpeg\r\n\r\n" + j + b"\r\n" for j in jpegs)
+
+
+CABECERAS_MJPEG = b"Content-Type: multipart/x-mixed-replace; boundary=frame\r\n"
+
+
+def test_cuerpo_sin_chunked(reactor, servidor):
+    jpegs = [jpeg(v) for v in (0, 128, 255)]
+    s = servidor(b"HTTP/1.1 200 OK\r\n" + CABECERAS_MJPEG + b"\r\n" + multipart(jpegs))
+    resultado = leer(reactor, s.url)
+    assert resultado.error is None
+    assert resultado.frames == jpegs
+
+
+def test_cabeceras_en_lecturas_sueltas(reactor, servidor):
+    jpegs = [jpeg(v) for v in (0, 255)]
+    cabeceras = b"HTTP/1.1 200 OK\r\n" + CABECERAS_MJPEG + b"\r\n"
+    s = servidor(cabeceras + multipart(jpegs), tamano_envio=3)
+    resultado = leer(reactor, s.url)
+    assert resultado.error is None
+    assert resultado.frames == jpegs
+
+
+def test_cuerpo_chunked_con_extensiones(reactor, servidor):
+    jpegs = [jpeg(v) for v in (10, 20, 30)]
+    cuerpo = multipart(jpegs)
+    trozos = [cuerpo[i:i + 777] for i in range(0, len(cuerpo), 777)]
+    chunked = b"".join(b"%x;ext=1\r\n%s\r\n" % (len(t), t) for t in trozos) + b"0\r\n\r\n"
+    s = servidor(b"HTTP/1.1 200 OK\r\n" + CABECERAS_MJPEG + b"Transfer-Encoding: chunked\r\n\r\n" + chunked)
+    resultado = leer(reactor, s.url)
+    assert resultado.error is None
+    assert resultado.frames == jpegs
+
+
+@pytest.mark.parametrize("estado", [b"404 Not Found", b"503 Service Unavailable", b"302 Found"])
+def test_estado_distinto_de_200(reactor, servidor, estado):
+    s = servidor(b"HTTP/1.1 " + estado + b"\r\nContent-Length: 0\r\n\r\n")
+    resultado = leer(reactor, s.url)
+    assert resultado.error == "Error en stream: HTTP " + estado.decode()
+    assert resultado.frames == []
+
+
+@pytest.mark.parametrize("linea", [b"HTTP/1.1 OK", b"hola"])
+def test_linea_de_estado_invalida(reactor, servidor, linea):
+    s = servidor(linea + b"\r\n\r\n")
+    assert "respuesta HTTP inválida" in leer(reactor, s.url).error
+
+
+def test_cabeceras_demasiado_largas_sin_terminar(reactor, servidor):
+    s = servidor(b"HTTP/1.1 200 OK\r\n" + b"X-Relleno: " + b"a" * (2 * MAXIMO_CABECERAS))
+    resultado = leer(reactor, s.url)
+    assert resultado.error == "Error en stream: cabeceras HTTP demasiado largas"
+
+
+def test_cabeceras_demasiado_largas(reactor, servidor):
+    relleno = b"X-Relleno: " + b"a" * 1000 + b"\r\n"
+    cabeceras = relleno * (MAXIMO_CABECERAS // len(relleno) + 2)
+    s = servidor(b"HTTP/1.1 200 OK\r\n" + CABECERAS_MJPEG + cabeceras + b"\r\n" + multipart([jpeg(0)]))
+    resultado = leer(reactor, s.url)
+    assert resultado.error == "Error en stream: cabeceras HTTP demasiado largas"
+    assert resultado.frames == []
+
+
+def test_host_que_no_resuelve(reactor):
+    resultado = leer(reactor, "http://no-existe.invalid/video/0")
+    assert resultado.error.startswith("Error en stream:")